@@ -0,0 +1,382 @@
+"""Combinatorial expected-value analysis of player decisions.
+
+Expected values are computed combinatorially over the unseen cards (the rest
+of the shoe and the dealer's hole card) under the rules of ``GameSession``:
+the dealer stands on all 17, a hand reaching 21 stands automatically and any
+two cards may be doubled, including after a split. Values are expressed per
+unit of the hand's bet.
+
+Naturals are resolved on the deal, so a decision is only ever taken when the
+dealer does not hold blackjack. Both the hole card and the player's draws are
+conditioned on that: with an Ace or a ten up, a card that could not be in the
+hole is slightly more likely to reach the player.
+
+When the player keeps hitting, only the first ``CARD_REMOVALS`` cards drawn
+are taken out of the shoe; later ones, for the player and the dealer alike,
+are drawn from the shoe as it was then. Such long hands are rare enough that
+this moves an EV by a few 1e-5 at most, at a fraction of the cost.
+
+Splits follow the engine's limit of ``MAX_PLAYER_HANDS`` hands, resplits
+included, with one simplification: every split hand is evaluated against the
+same shoe, ignoring the cards the other split hands take from it.
+
+Compositions are tuples of ten counts indexed by card category: Ace, 2..9 and
+ten-valued cards. The dealer's final-total distribution is memoized on
+``(total, soft, composition)`` with an LRU cache, so the many player lines that
+reach the same shoe state share one dealer computation.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .blackjack import (
+    ACE_RANK_INDEX,
+    CARD_RANK_INDEXES,
+    CARD_VALUES,
+    MAX_PLAYER_HANDS,
+    NUMBER_OF_DECKS,
+    GameSession,
+)
+
+Composition = Tuple[int, ...]
+
+CATEGORY_COUNT = 10
+TEN_CATEGORY = 9
+# Hard value of each category; the Ace counts as 1 and is promoted when soft.
+CATEGORY_VALUES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+DEALER_TOTALS = (17, 18, 19, 20, 21)
+CACHE_SIZE = 1 << 18
+# Cards the player draws after a decision that are taken out of the shoe.
+CARD_REMOVALS = 3
+
+
+def card_category(code: int) -> int:
+    if CARD_RANK_INDEXES[code] == ACE_RANK_INDEX:
+        return 0
+    return CARD_VALUES[code] - 1
+
+
+def cards_composition(cards: Iterable[int]) -> Composition:
+    """Composition of the given card codes."""
+    counts = [0] * CATEGORY_COUNT
+    for code in cards:
+        counts[card_category(code)] += 1
+    return tuple(counts)
+
+
+def shoe_composition(removed: Iterable[int] = (), number_of_decks: int = NUMBER_OF_DECKS) -> Composition:
+    """Composition of a fresh shoe minus the given card codes."""
+    counts = [4 * number_of_decks] * TEN_CATEGORY + [16 * number_of_decks]
+    for code in removed:
+        category = card_category(code)
+        if counts[category] <= 0:
+            raise ValueError("Cannot remove a card that is no longer in the shoe.")
+        counts[category] -= 1
+    return tuple(counts)
+
+
+# Internally a composition is packed into one int, ``COUNT_BITS`` per category,
+# so removing a card is a subtraction and cache keys hash as plain ints.
+COUNT_BITS = 9
+_COUNT_MASK = (1 << COUNT_BITS) - 1
+_UNITS = tuple(1 << (COUNT_BITS * category) for category in range(CATEGORY_COUNT))
+_SHIFTS = tuple(COUNT_BITS * category for category in range(CATEGORY_COUNT))
+_OUTCOME_COUNT = len(DEALER_TOTALS) + 1
+_BUST = len(DEALER_TOTALS)
+
+
+def _pack(composition: Composition) -> int:
+    if len(composition) != CATEGORY_COUNT or any(not 0 <= count <= _COUNT_MASK for count in composition):
+        raise ValueError("Invalid shoe composition.")
+    return sum(count << shift for count, shift in zip(composition, _SHIFTS))
+
+
+# Hole card category that would complete a dealer blackjack, by upcard category.
+_BLACKJACK_HOLE = {0: TEN_CATEGORY, TEN_CATEGORY: 0}
+
+
+def _total(hard: int, soft: bool) -> int:
+    return hard + 10 if soft and hard <= 11 else hard
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _dealer_final(hard: int, has_ace: bool, packed: int, remaining: int) -> Tuple[float, ...]:
+    """Probabilities of finishing on 17, 18, 19, 20, 21 or busting from a hand below 17."""
+    # Unrolled into one accumulator per outcome: this is the innermost loop of every analysis.
+    p17 = p18 = p19 = p20 = p21 = bust = 0.0
+    for category in range(CATEGORY_COUNT):
+        count = (packed >> _SHIFTS[category]) & _COUNT_MASK
+        if not count:
+            continue
+        weight = count / remaining
+        next_hard = hard + category + 1
+        next_ace = has_ace or not category
+        total = next_hard + 10 if next_ace and next_hard <= 11 else next_hard
+        if total < 17:
+            b17, b18, b19, b20, b21, b_bust = _dealer_final(next_hard, next_ace, packed - _UNITS[category], remaining - 1)
+            p17 += weight * b17
+            p18 += weight * b18
+            p19 += weight * b19
+            p20 += weight * b20
+            p21 += weight * b21
+            bust += weight * b_bust
+        elif total > 21:
+            bust += weight
+        elif total == 17:
+            p17 += weight
+        elif total == 18:
+            p18 += weight
+        elif total == 19:
+            p19 += weight
+        elif total == 20:
+            p20 += weight
+        else:
+            p21 += weight
+    return (p17, p18, p19, p20, p21, bust)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _dealer_distribution(upcard: int, packed: int, remaining: int) -> Tuple[float, ...]:
+    # With a blackjack the round would be over, so the hole card cannot complete it.
+    excluded = _BLACKJACK_HOLE.get(upcard)
+    candidates = remaining
+    if excluded is not None:
+        candidates -= (packed >> _SHIFTS[excluded]) & _COUNT_MASK
+    result = [0.0] * _OUTCOME_COUNT
+    for category in range(CATEGORY_COUNT):
+        count = (packed >> _SHIFTS[category]) & _COUNT_MASK
+        if not count or category == excluded:
+            continue
+        weight = count / candidates
+        hard = CATEGORY_VALUES[upcard] + CATEGORY_VALUES[category]
+        has_ace = upcard == 0 or category == 0
+        total = _total(hard, has_ace)
+        if total >= 17:
+            result[total - 17] += weight
+            continue
+        branch = _dealer_final(hard, has_ace, packed - _UNITS[category], remaining - 1)
+        for index in range(_OUTCOME_COUNT):
+            result[index] += weight * branch[index]
+    return tuple(result)
+
+
+def dealer_distribution(upcard: int, composition: Composition) -> Tuple[float, ...]:
+    """Dealer final totals (17..21, bust) given the upcard category and no blackjack.
+
+    ``composition`` excludes the upcard but still contains the hole card.
+    """
+    return _dealer_distribution(upcard, _pack(composition), sum(composition))
+
+
+def _draws(upcard: int, packed: int, remaining: int) -> List[Tuple[int, float, int]]:
+    """Categories the player can draw next, their probability and the shoe left after.
+
+    The draw is conditioned on the hole card, still among the ``remaining``
+    cards, not completing a dealer blackjack.
+    """
+    excluded = _BLACKJACK_HOLE.get(upcard)
+    blocked = 0 if excluded is None else (packed >> _SHIFTS[excluded]) & _COUNT_MASK
+    conditioned = remaining > 1 and remaining > blocked
+    draws = []
+    for category in range(CATEGORY_COUNT):
+        count = (packed >> _SHIFTS[category]) & _COUNT_MASK
+        if not count:
+            continue
+        if conditioned:
+            # P(draw) * P(no blackjack | draw) / P(no blackjack)
+            open_holes = remaining - 1 - blocked + (category == excluded)
+            weight = count * open_holes / ((remaining - 1) * (remaining - blocked))
+        else:
+            weight = count / remaining
+        draws.append((category, weight, packed - _UNITS[category]))
+    return draws
+
+
+def _stand_ev(total: int, upcard: int, packed: int, remaining: int) -> float:
+    if total > 21:
+        return -1.0
+    distribution = _dealer_distribution(upcard, packed, remaining)
+    ev = distribution[_BUST]
+    for index, dealer_total in enumerate(DEALER_TOTALS):
+        if total > dealer_total:
+            ev += distribution[index]
+        elif total < dealer_total:
+            ev -= distribution[index]
+    return ev
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _best_ev(hard: int, has_ace: bool, upcard: int, packed: int, remaining: int, removals: int) -> float:
+    """EV of optimal hit/stand play from a hand that may no longer double.
+
+    The next ``removals`` cards drawn are taken out of the shoe; later ones
+    are drawn from the shoe as it is then.
+    """
+    total = _total(hard, has_ace)
+    if total > 21:
+        return -1.0
+    stand = _stand_ev(total, upcard, packed, remaining)
+    if total == 21:
+        return stand
+    return max(stand, _hit_ev(hard, has_ace, upcard, packed, remaining, removals))
+
+
+def _hit_ev(hard: int, has_ace: bool, upcard: int, packed: int, remaining: int, removals: int) -> float:
+    ev = 0.0
+    for category, weight, after in _draws(upcard, packed, remaining):
+        if removals:
+            branch = _best_ev(
+                hard + CATEGORY_VALUES[category], has_ace or category == 0, upcard, after, remaining - 1, removals - 1
+            )
+        else:
+            branch = _best_ev(hard + CATEGORY_VALUES[category], has_ace or category == 0, upcard, packed, remaining, 0)
+        ev += weight * branch
+    return ev
+
+
+def _double_ev(hard: int, has_ace: bool, upcard: int, packed: int, remaining: int) -> float:
+    ev = 0.0
+    for category, weight, after in _draws(upcard, packed, remaining):
+        total = _total(hard + CATEGORY_VALUES[category], has_ace or category == 0)
+        ev += weight * _stand_ev(total, upcard, after, remaining - 1)
+    return 2 * ev
+
+
+def _split_ev(pair_category: int, upcard: int, packed: int, remaining: int, max_hands: int) -> float:
+    """EV of splitting, for all the resulting hands together.
+
+    Each hand draws its second card and is then played optimally with double
+    after split; a hand paired again is resplit while fewer than ``max_hands``
+    hands are in play. Every hand draws from the same shoe, and resplitting
+    follows the best fixed limit on the number of hands.
+    """
+    pair_probability = 0.0
+    # Contribution of a hand drawing anything but a pair card, and value of a pair left unsplit.
+    unpaired = unsplit = 0.0
+    for category, weight, after in _draws(upcard, packed, remaining):
+        hard = CATEGORY_VALUES[pair_category] + CATEGORY_VALUES[category]
+        has_ace = pair_category == 0 or category == 0
+        played = max(
+            _best_ev(hard, has_ace, upcard, after, remaining - 1, CARD_REMOVALS),
+            _double_ev(hard, has_ace, upcard, after, remaining - 1),
+        )
+        if category == pair_category:
+            pair_probability, unsplit = weight, played
+        else:
+            unpaired += weight * played
+
+    def hands_ev(hands: int, waiting: int, limit: int) -> float:
+        # ``waiting`` hands still hold a single card of the pair.
+        if not waiting:
+            return 0.0
+        ev = unpaired + (1 - pair_probability) * hands_ev(hands, waiting - 1, limit)
+        if pair_probability:
+            if hands < limit:
+                ev += pair_probability * hands_ev(hands + 1, waiting + 1, limit)
+            else:
+                ev += pair_probability * (unsplit + hands_ev(hands, waiting - 1, limit))
+        return ev
+
+    return max(hands_ev(2, 2, limit) for limit in range(2, max(2, max_hands) + 1))
+
+
+def analyze_hand(
+    cards: Sequence[int],
+    dealer_up: int,
+    composition: Optional[Composition] = None,
+    *,
+    can_double: Optional[bool] = None,
+    can_split: Optional[bool] = None,
+    hands: int = 1,
+) -> Dict[str, float]:
+    """Expected value of every legal action for a player hand.
+
+    ``cards`` and ``dealer_up`` are card codes. ``composition`` is the unseen
+    shoe, hole card included; it defaults to a fresh shoe minus the visible
+    cards. ``hands`` is the number of hands the player already holds, which
+    limits resplits. The values carry the simplifications listed in the module
+    docstring, notably that split hands do not see each other's cards.
+    """
+    if composition is None:
+        composition = shoe_composition([*cards, dealer_up])
+    upcard = card_category(dealer_up)
+    categories = [card_category(card) for card in cards]
+    hard = sum(CATEGORY_VALUES[category] for category in categories)
+    has_ace = 0 in categories
+    if can_double is None:
+        can_double = len(cards) == 2
+    if can_split is None:
+        can_split = len(cards) == 2 and CARD_RANK_INDEXES[cards[0]] == CARD_RANK_INDEXES[cards[1]]
+
+    packed = _pack(composition)
+    remaining = sum(composition)
+    total = _total(hard, has_ace)
+    results = {"stand": _stand_ev(total, upcard, packed, remaining)}
+    if total < 21:
+        results["hit"] = _hit_ev(hard, has_ace, upcard, packed, remaining, CARD_REMOVALS)
+        if can_double:
+            results["double"] = _double_ev(hard, has_ace, upcard, packed, remaining)
+    if can_split:
+        results["split"] = _split_ev(categories[0], upcard, packed, remaining, MAX_PLAYER_HANDS - hands + 1)
+    return results
+
+
+def analyze_session(session: GameSession, hand_index: int) -> Dict[str, float]:
+    """EVs for a hand of a live session, from the cards its shoe has not dealt yet.
+
+    The shoe lives across rounds, so the unseen cards are the undealt part of
+    the shoe plus the dealer's hole card.
+    """
+    dealer_cards = session.dealer_hand.cards
+    return analyze_hand(
+        session.player_hands[hand_index].hand.cards,
+        dealer_cards[0],
+        cards_composition([*session.deck.undealt(), *dealer_cards[1:]]),
+        can_double=session.can_double_hand(hand_index),
+        can_split=session.can_split_hand(hand_index),
+        hands=len(session.player_hands),
+    )
+
+
+def score_decision(
+    cards: Sequence[int],
+    dealer_up: int,
+    action: str,
+    composition: Optional[Composition] = None,
+    **hand: Union[bool, int],
+) -> Dict[str, object]:
+    """Compare a recorded action with the best one; ``regret`` is the EV given up.
+
+    ``hand`` takes the keyword arguments of ``analyze_hand``.
+    """
+    evs = analyze_hand(cards, dealer_up, composition, **hand)
+    if action not in evs:
+        raise ValueError(f"'{action}' is not a legal action for this hand.")
+    best = max(evs, key=evs.get)
+    return {
+        "action": action,
+        "ev": evs[action],
+        "best_action": best,
+        "best_ev": evs[best],
+        "regret": evs[best] - evs[action],
+        "evs": evs,
+    }
+
+
+def clear_caches() -> None:
+    _dealer_final.cache_clear()
+    _dealer_distribution.cache_clear()
+    _best_ev.cache_clear()
+
+
+__all__ = [
+    "Composition",
+    "analyze_hand",
+    "analyze_session",
+    "cards_composition",
+    "clear_caches",
+    "dealer_distribution",
+    "score_decision",
+    "shoe_composition",
+]
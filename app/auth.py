@@ -1,8 +1,11 @@
 """Authentication helpers for password hashing and token management."""
 from __future__ import annotations
 
+import asyncio
+import os
 import secrets
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -11,6 +14,10 @@ import bcrypt
 from . import db
 
 TOKEN_TTL_HOURS = 24
+# bcrypt releases the GIL while hashing, so one thread per core keeps every core busy.
+BCRYPT_THREADS = int(os.environ.get("BLACKJACK_BCRYPT_THREADS", str(os.cpu_count() or 1)))
+
+bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_THREADS, thread_name_prefix="bcrypt")
 
 
 def hash_password(password: str) -> str:
@@ -22,6 +29,15 @@ def verify_password(password: str, password_hash: str) -> bool:
     return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
 
 
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(bcrypt_executor, hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(bcrypt_executor, verify_password, password, password_hash)
+
+
 def generate_token(user_id: int) -> str:
     token = secrets.token_hex(24)
     db.save_token(token, user_id)
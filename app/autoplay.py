@@ -0,0 +1,101 @@
+"""Server-side autoplay: many rounds under a named strategy in one request.
+
+Rounds are dealt from a pooled shoe and played through ``GameSession`` with
+the strategies of ``app.simulation``, so results match what the same moves
+would give through the game endpoints. The caller's balance is tracked in
+memory while playing: a round is only dealt if its stakes are covered, and
+doubles or splits that are not fall back to a hit, so a run never loses more
+than ``funds``. The net result is then settled with a single balance update.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .blackjack import GameSession, shoe_pool
+from .schemas import MAX_AUTOPLAY_ROUNDS
+from .simulation import OUTCOMES, STRATEGIES, SimulationResult, play_session_round
+
+# Summary lines per run when the caller does not choose a reporting interval.
+DEFAULT_REPORTS = 10
+
+_OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOMES)}
+
+
+@dataclass
+class AutoplayRun:
+    """Rounds played by ``run_autoplay`` and the running statistics at each report."""
+
+    strategy: str
+    bet: int
+    result: SimulationResult
+    net: int = 0
+    stopped: Optional[str] = None
+    reports: List[Dict[str, object]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "strategy": self.strategy,
+            "net": self.net,
+            **self.result.to_dict(),
+        }
+
+
+def run_autoplay(
+    rounds: int,
+    strategy: str,
+    bet: int,
+    side_bets: Dict[str, int],
+    funds: Optional[int] = None,
+    owner_id: Optional[int] = None,
+    report_every: Optional[int] = None,
+) -> AutoplayRun:
+    """Play up to ``rounds`` rounds, stopping early once ``funds`` cannot cover a round."""
+    play = STRATEGIES[strategy]
+    report_every = report_every or max(1, -(-rounds // DEFAULT_REPORTS))
+    stake = bet + sum(side_bets.values())
+    run = AutoplayRun(strategy=strategy, bet=bet, result=SimulationResult(bet=bet))
+    nets: List[int] = []
+    outcomes: List[int] = []
+    wagered = 0
+    side_net: Dict[str, int] = {}
+    session: Optional[GameSession] = None
+
+    def report() -> None:
+        nonlocal nets, outcomes, wagered, side_net
+        run.result.add_batch(np.array(nets, dtype=np.int64), wagered, np.array(outcomes, dtype=np.int8), side_net)
+        run.reports.append(run.summary())
+        nets, outcomes, wagered, side_net = [], [], 0, {}
+
+    for _ in range(rounds):
+        available = None if funds is None else funds + run.net
+        if available is not None and stake > available:
+            run.stopped = "insufficient_balance"
+            break
+        if session is None:
+            session = GameSession(bet=bet, owner_id=owner_id, side_bets=side_bets, deck=shoe_pool.acquire())
+        else:
+            session.next_round(bet=bet, side_bets=side_bets)
+        play_session_round(session, play, None if available is None else available - stake)
+
+        staked = session.bet + sum(session.side_bets.values())
+        net = session.payout() - staked
+        run.net += net
+        nets.append(net)
+        wagered += staked
+        outcomes.extend(_OUTCOME_CODES[hand.outcome] for hand in session.player_hands if hand.outcome)
+        for key, amount in session.side_bets.items():
+            if amount <= 0:
+                continue
+            payout = int(session.side_bet_results.get(key, {}).get("payout", 0))
+            side_net[key] = side_net.get(key, 0) + payout - amount
+        if len(nets) == report_every:
+            report()
+    if nets or not run.reports:
+        report()
+    return run
+
+
+__all__ = ["MAX_AUTOPLAY_ROUNDS", "AutoplayRun", "run_autoplay"]
@@ -1,11 +1,18 @@
 """Blackjack game logic components."""
 from __future__ import annotations
 
+import base64
+import os
 import random
+import time
 import uuid
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from threading import Lock
-from typing import Dict, List, Optional
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
 RANKS = [
@@ -26,70 +33,309 @@ RANKS = [
 
 
 NUMBER_OF_DECKS = 8
+DEFAULT_PENETRATION = 0.75
+# Cards always left behind the cut card, about a round with every hand split.
+CUT_CARD_RESERVE = 26
+SESSION_IDLE_TTL_SECONDS = 30 * 60
+SESSION_SWEEP_INTERVAL_SECONDS = 30
+MAX_GUEST_SESSIONS = 50_000
+MAX_OWNED_SESSIONS = 50_000
+SESSION_SHARDS = 32
+MAX_PLAYER_HANDS = 4
+# Served states kept per session so clients can ask for changes since one of them.
+SERIALIZED_HISTORY = 8
+# "eager" keeps a shuffled byte array per shoe, "lazy" only a seed and a cursor.
+DECK_MODE = os.environ.get("BLACKJACK_DECK_MODE", "eager")
+# Prefixed to session ids so a front proxy can route each session back to the
+# process that holds it in memory; see app.routing.
+WORKER_ID = os.environ.get("BLACKJACK_WORKER_ID", "")
+SESSION_ID_SEPARATOR = "-"
+if WORKER_ID and not WORKER_ID.isalnum():
+    raise ValueError("BLACKJACK_WORKER_ID must be alphanumeric.")
+CARDS_PER_DECK = len(SUITS) * len(RANKS)
+ACE_RANK_INDEX = RANKS.index("Ace")
 
 
-@dataclass(frozen=True)
-class Card:
-    """Represents a card in a standard deck of 52 cards."""
+def _rank_value(rank: str) -> int:
+    if rank in {"Jack", "Queen", "King"}:
+        return 10
+    if rank == "Ace":
+        return 11
+    return int(rank)
 
-    suit: str
-    rank: str
 
-    @property
-    def value(self) -> int:
-        if self.rank in {"Jack", "Queen", "King"}:
-            return 10
-        if self.rank == "Ace":
-            return 11
-        return int(self.rank)
+# The engine works on compact card codes: ``code = suit_index * 13 + rank_index``.
+# Every per-card attribute is looked up in the tables below instead of being
+# stored on an object, so a hand is a list of small ints and a shoe a byte array.
+CARD_SUITS: Tuple[str, ...] = tuple(suit for suit in SUITS for _ in RANKS)
+CARD_RANKS: Tuple[str, ...] = tuple(rank for _ in SUITS for rank in RANKS)
+CARD_RANK_INDEXES: Tuple[int, ...] = tuple(index for _ in SUITS for index in range(len(RANKS)))
+CARD_VALUES: Tuple[int, ...] = tuple(_rank_value(rank) for rank in CARD_RANKS)
+
+
+def card_code(suit: str, rank: str) -> int:
+    return SUITS.index(suit) * len(RANKS) + RANKS.index(rank)
+
+
+def card_to_dict(code: int) -> Dict[str, str]:
+    return {"suit": CARD_SUITS[code], "rank": CARD_RANKS[code]}
 
-    def to_dict(self) -> Dict[str, str]:
-        return {"suit": self.suit, "rank": self.rank}
+
+def cut_card_position(size: int, penetration: float) -> int:
+    """Position of the cut card in a shoe of ``size`` cards."""
+    if not 0 < penetration < 1:
+        raise ValueError("Penetration must be in the (0, 1) range.")
+    if size <= CUT_CARD_RESERVE:
+        raise ValueError(f"A shoe needs more than {CUT_CARD_RESERVE} cards.")
+    return max(1, min(int(size * penetration), size - CUT_CARD_RESERVE))
+
+
+def new_session_id() -> str:
+    token = uuid.uuid4().hex
+    return f"{WORKER_ID}{SESSION_ID_SEPARATOR}{token}" if WORKER_ID else token
 
 
 class Deck:
-    """Represents a shuffled shoe of standard 52-card decks."""
-
-    def __init__(self, number_of_decks: int = NUMBER_OF_DECKS) -> None:
-        self.cards: List[Card] = [
-            Card(suit=suit, rank=rank)
-            for _ in range(number_of_decks)
-            for suit in SUITS
-            for rank in RANKS
-        ]
+    """Represents a shuffled shoe of standard 52-card decks stored as card codes.
+
+    The shoe is dealt from a cursor rather than consumed, so it can live across
+    rounds: once the cut card placed at ``penetration`` of the shoe is reached,
+    ``reshuffle`` shuffles the same buffer in place before the next round. The
+    cut card always leaves ``CUT_CARD_RESERVE`` cards to finish the round; a
+    round that still runs out reshuffles the shoe rather than failing.
+    """
+
+    def __init__(
+        self,
+        number_of_decks: int = NUMBER_OF_DECKS,
+        penetration: float = DEFAULT_PENETRATION,
+    ) -> None:
+        self.cards = array("B", range(CARDS_PER_DECK)) * number_of_decks
+        self.penetration = penetration
+        self.cut_card = cut_card_position(len(self.cards), penetration)
+        self.position = 0
         random.shuffle(self.cards)
 
-    def draw(self) -> Card:
-        if not self.cards:
-            raise ValueError("The deck is empty. Cannot draw more cards.")
-        return self.cards.pop()
+    @property
+    def remaining(self) -> int:
+        return len(self.cards) - self.position
+
+    @property
+    def needs_shuffle(self) -> bool:
+        return self.position >= self.cut_card
+
+    def reshuffle(self) -> None:
+        random.shuffle(self.cards)
+        self.position = 0
+
+    def undealt(self) -> List[int]:
+        """Codes of the cards left to deal before the shoe runs out."""
+        return list(self.cards[self.position :])
+
+    def draw(self) -> int:
+        if self.position >= len(self.cards):
+            self.reshuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+    def to_state(self) -> Dict[str, object]:
+        return {
+            "kind": "eager",
+            "cards": base64.b64encode(self.cards.tobytes()).decode("ascii"),
+            "penetration": self.penetration,
+            "position": self.position,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, object]) -> "Deck":
+        deck = cls.__new__(cls)
+        deck.cards = array("B", base64.b64decode(str(state["cards"])))
+        deck.penetration = float(state["penetration"])
+        deck.cut_card = cut_card_position(len(deck.cards), deck.penetration)
+        deck.position = int(state["position"])
+        return deck
+
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_CODE_BITS = 6
+_CODE_MASK = (1 << _CODE_BITS) - 1
+
+
+def _mix64(value: int) -> int:
+    """SplitMix64 finalizer, used as a counter-based PRNG."""
+    value &= _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _swap_array(size: int, entries: Iterable[int] = ()) -> array:
+    # Entries pack ``position << 6 | code``; two bytes each up to 1024 positions.
+    return array("H" if size <= 1 << (16 - _CODE_BITS) else "I", entries)
+
+
+class LazyDeck:
+    """Shoe that produces its cards on demand from a seed and a draw cursor.
+
+    Cards are dealt by a lazy Fisher-Yates shuffle over the unshuffled shoe,
+    where position ``p`` holds card code ``p % 52``. The swap target of draw
+    ``i`` is derived from ``(seed, i)`` alone, so the only other state is the
+    positions ahead of the cursor displaced so far, with the card code each
+    now holds. They are packed two bytes apiece in one array sorted by
+    position, which peaks at about a quarter of the shoe halfway through.
+    """
+
+    __slots__ = ("size", "penetration", "cut_card", "seed", "position", "_swaps")
+
+    def __init__(
+        self,
+        number_of_decks: int = NUMBER_OF_DECKS,
+        penetration: float = DEFAULT_PENETRATION,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.size = CARDS_PER_DECK * number_of_decks
+        self.penetration = penetration
+        self.cut_card = cut_card_position(self.size, penetration)
+        self.seed = random.getrandbits(64) if seed is None else seed & _MASK64
+        self.position = 0
+        self._swaps = _swap_array(self.size)
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self.position
+
+    @property
+    def needs_shuffle(self) -> bool:
+        return self.position >= self.cut_card
+
+    @property
+    def swaps(self) -> List[Tuple[int, int]]:
+        """Displaced positions ahead of the cursor and the card code each holds."""
+        return [(entry >> _CODE_BITS, entry & _CODE_MASK) for entry in self._swaps]
+
+    def reshuffle(self) -> None:
+        self.seed = random.getrandbits(64)
+        self.position = 0
+        self._swaps = _swap_array(self.size)
+
+    def undealt(self) -> List[int]:
+        """Codes of the cards left to deal, in no particular order."""
+        swaps = dict(self.swaps)
+        return [swaps.get(index, index % CARDS_PER_DECK) for index in range(self.position, self.size)]
+
+    def draw(self) -> int:
+        if self.position >= self.size:
+            self.reshuffle()
+        index = self.position
+        target = index + _mix64(self.seed + (index + 1) * _GOLDEN_GAMMA) % (self.size - index)
+        swaps = self._swaps
+        # Entries behind the cursor are dropped as it passes, so ``index`` can only be first.
+        if swaps and swaps[0] >> _CODE_BITS == index:
+            current = swaps.pop(0) & _CODE_MASK
+        else:
+            current = index % CARDS_PER_DECK
+        self.position = index + 1
+        if target == index:
+            return current
+        key = target << _CODE_BITS
+        slot = bisect_left(swaps, key)
+        if slot < len(swaps) and swaps[slot] >> _CODE_BITS == target:
+            card = swaps[slot] & _CODE_MASK
+            swaps[slot] = key | current
+            return card
+        swaps.insert(slot, key | current)
+        return target % CARDS_PER_DECK
+
+    def to_state(self) -> Dict[str, object]:
+        return {
+            "kind": "lazy",
+            "size": self.size,
+            "penetration": self.penetration,
+            "seed": self.seed,
+            "position": self.position,
+            "swaps": [list(swap) for swap in self.swaps],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, object]) -> "LazyDeck":
+        deck = cls.__new__(cls)
+        deck.size = int(state["size"])
+        deck.penetration = float(state["penetration"])
+        deck.cut_card = cut_card_position(deck.size, deck.penetration)
+        deck.seed = int(state["seed"])
+        deck.position = int(state["position"])
+        deck.set_swaps((int(index), int(value)) for index, value in state["swaps"])
+        return deck
+
+    def set_swaps(self, swaps: Iterable[Tuple[int, int]]) -> None:
+        """Replace the displaced positions with ``(position, card code)`` pairs.
+
+        Values may also be the shoe positions stored by earlier versions in
+        place of card codes; only their card code is kept.
+        """
+        entries = (index << _CODE_BITS | value % CARDS_PER_DECK for index, value in swaps if index >= self.position)
+        self._swaps = _swap_array(self.size, sorted(entries))
+
+
+Shoe = Union[Deck, LazyDeck]
+
+DECK_FACTORIES: Dict[str, Callable[[], Shoe]] = {
+    "eager": Deck,
+    "lazy": LazyDeck,
+}
+
+
+def shoe_from_state(state: Dict[str, object]) -> Shoe:
+    kind = DECK_FACTORIES[str(state["kind"])]
+    return kind.from_state(state)
 
 
 @dataclass
 class Hand:
-    """Represents a Blackjack hand."""
+    """Represents a Blackjack hand.
+
+    The hard total (every Ace counted as 1) and the number of Aces are kept up
+    to date as cards are added, so ``value`` and ``is_blackjack`` are O(1).
+    """
+
+    cards: List[int] = field(default_factory=list)
+    hard_total: int = field(default=0, init=False, repr=False)
+    ace_count: int = field(default=0, init=False, repr=False)
 
-    cards: List[Card] = field(default_factory=list)
+    def __post_init__(self) -> None:
+        for card in self.cards:
+            self._count(card)
 
-    def add_card(self, card: Card) -> None:
+    def _count(self, card: int) -> None:
+        if CARD_RANK_INDEXES[card] == ACE_RANK_INDEX:
+            self.hard_total += 1
+            self.ace_count += 1
+        else:
+            self.hard_total += CARD_VALUES[card]
+
+    def add_card(self, card: int) -> None:
         self.cards.append(card)
+        self._count(card)
+
+    @property
+    def is_soft(self) -> bool:
+        # At most one Ace can count as 11 without busting.
+        return self.ace_count > 0 and self.hard_total <= 11
 
     @property
     def value(self) -> int:
-        total = sum(card.value for card in self.cards)
-        aces = sum(1 for card in self.cards if card.rank == "Ace")
-        # Adjust Ace value from 11 to 1 if total busts
-        while total > 21 and aces:
-            total -= 10
-            aces -= 1
-        return total
+        if self.is_soft:
+            return self.hard_total + 10
+        return self.hard_total
 
     def is_blackjack(self) -> bool:
-        return len(self.cards) == 2 and self.value == 21
+        return len(self.cards) == 2 and self.ace_count > 0 and self.hard_total == 11
 
     def to_dict(self) -> Dict[str, List[Dict[str, str]]]:
         return {
-            "cards": [card.to_dict() for card in self.cards],
+            "cards": [card_to_dict(card) for card in self.cards],
             "value": self.value,
         }
 
@@ -112,7 +358,7 @@ class PlayerHandState:
         can_double: bool,
     ) -> Dict[str, object]:
         return {
-            "cards": [card.to_dict() for card in self.hand.cards],
+            "cards": [card_to_dict(card) for card in self.hand.cards],
             "value": self.hand.value,
             "bet": self.bet,
             "is_active": is_active,
@@ -127,18 +373,17 @@ SIDE_BET_DEFINITIONS: Dict[str, Dict[str, object]] = {
     "pair": {
         "label": "Paire",
         "payout_multiplier": 12,  # 11:1 including the original stake
-        "evaluator": lambda cards, dealer_up: len(cards) == 2 and cards[0].rank == cards[1].rank,
+        "evaluator": lambda cards, dealer_up: (
+            len(cards) == 2 and CARD_RANK_INDEXES[cards[0]] == CARD_RANK_INDEXES[cards[1]]
+        ),
         "win_message": "Paire !",
         "lose_message": "Pas de paire.",
     },
     "suited_pair": {
         "label": "Paire assortie",
         "payout_multiplier": 26,  # 25:1 including the stake
-        "evaluator": lambda cards, dealer_up: (
-            len(cards) == 2
-            and cards[0].rank == cards[1].rank
-            and cards[0].suit == cards[1].suit
-        ),
+        # Identical rank and suit means identical card code.
+        "evaluator": lambda cards, dealer_up: len(cards) == 2 and cards[0] == cards[1],
         "win_message": "Paire assortie !",
         "lose_message": "Paire non assortie.",
     },
@@ -153,21 +398,74 @@ class GameSession:
         bet: int = 0,
         owner_id: Optional[int] = None,
         side_bets: Optional[Dict[str, int]] = None,
+        deck: Optional[Shoe] = None,
     ) -> None:
-        self.session_id: str = uuid.uuid4().hex
+        self._reset(new_session_id(), owner_id, deck if deck is not None else Deck())
+        self._start_round(bet, side_bets)
+
+    @classmethod
+    def _blank(cls, session_id: str, owner_id: Optional[int], deck: Shoe, version: int = 0) -> "GameSession":
+        """Session without a dealt round, for decoders that fill in a stored one."""
+        session = cls.__new__(cls)
+        session._reset(session_id, owner_id, deck, version)
+        return session
+
+    def _reset(self, session_id: str, owner_id: Optional[int], deck: Shoe, version: int = 0) -> None:
+        # Sets every attribute, so sessions built by ``_blank`` are complete.
+        self.session_id = session_id
         self.owner_id = owner_id
-        self.deck = Deck()
+        self.last_access = self.queued_at = time.monotonic()
+        # Serializes actions on this session; see SessionManager.checkout.
+        self.lock = Lock()
+        # Incremented on every mutation; see ``cached``.
+        self.version = version
+        self._cache: Dict[str, object] = {}
+        self._history: "OrderedDict[int, Dict[str, object]]" = OrderedDict()
+        self.deck: Shoe = deck
         self.dealer_hand = Hand()
-        self.player_hands: List[PlayerHandState] = [PlayerHandState(bet=bet)]
-        self.active_hand_index: Optional[int] = 0
+        self.player_hands: List[PlayerHandState] = []
+        self.active_hand_index: Optional[int] = None
         self.is_over = False
         self.outcome: Optional[str] = None
         self.is_settled = False
-        self.side_bets: Dict[str, int] = {
-            key: max(0, int(value)) for key, value in (side_bets or {}).items()
-        }
+        self.side_bets: Dict[str, int] = {}
         self.side_bet_results: Dict[str, Dict[str, object]] = {}
+
+    def _start_round(self, bet: int, side_bets: Optional[Dict[str, int]]) -> None:
+        if self.deck.needs_shuffle:
+            self.deck.reshuffle()
+        self.dealer_hand = Hand()
+        self.player_hands = [PlayerHandState(bet=bet)]
+        self.active_hand_index = 0
+        self.is_over = False
+        self.outcome = None
+        self.is_settled = False
+        self.side_bets = {key: max(0, int(value)) for key, value in (side_bets or {}).items()}
+        self.side_bet_results = {}
         self.initial_deal()
+        self._changed()
+
+    def next_round(self, bet: int = 0, side_bets: Optional[Dict[str, int]] = None) -> None:
+        """Deal a new round from the same shoe once the current one is over."""
+        if not self.is_over:
+            raise ValueError("The current round is still in progress.")
+        self._start_round(bet, side_bets)
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._cache.clear()
+
+    def cached(self, key: str, build: Callable[["GameSession"], object]) -> object:
+        """``build(self)``, memoized under ``key`` until the next mutation."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = build(self)
+            return value
+
+    def mark_settled(self) -> None:
+        self.is_settled = True
+        self._changed()
 
     @property
     def bet(self) -> int:
@@ -240,13 +538,13 @@ class GameSession:
     def can_split_hand(self, hand_index: int) -> bool:
         if self.is_over or not (0 <= hand_index < len(self.player_hands)):
             return False
-        if len(self.player_hands) >= 4:
+        if len(self.player_hands) >= MAX_PLAYER_HANDS:
             return False
         hand_state = self.player_hands[hand_index]
         if hand_state.outcome or hand_state.has_stood:
             return False
         cards = hand_state.hand.cards
-        return len(cards) == 2 and cards[0].rank == cards[1].rank
+        return len(cards) == 2 and CARD_RANK_INDEXES[cards[0]] == CARD_RANK_INDEXES[cards[1]]
 
     def can_double_hand(self, hand_index: int) -> bool:
         if self.is_over or not (0 <= hand_index < len(self.player_hands)):
@@ -256,6 +554,42 @@ class GameSession:
             return False
         return len(hand_state.hand.cards) == 2
 
+    def can_play_hand(self, hand_index: int) -> bool:
+        if self.is_over or not (0 <= hand_index < len(self.player_hands)):
+            return False
+        hand_state = self.player_hands[hand_index]
+        return not hand_state.outcome and not hand_state.has_stood
+
+    def apply_action(self, action: str, hand_index: Optional[int] = None) -> int:
+        """Play ``action`` on a hand, the active one by default, and return its index.
+
+        Raises ``ValueError`` when the action is not legal, leaving the session
+        unchanged.
+        """
+        index = self._resolve_hand_index(hand_index)
+        if index is None or not self.can_play_hand(index):
+            raise ValueError("Action impossible sur cette main.")
+        if action == "hit":
+            self.player_hit(index)
+        elif action == "stand":
+            self.player_stand(index)
+        elif action == "double":
+            if not self.player_double(index):
+                raise ValueError("Double impossible sur cette main.")
+        elif action == "split":
+            if not self.player_split(index):
+                raise ValueError("Split impossible sur cette main.")
+        else:
+            raise ValueError(f"Action inconnue : {action}.")
+        return index
+
+    def action_cost(self, action: str, hand_index: Optional[int] = None) -> int:
+        if action == "double":
+            return self.double_cost(hand_index)
+        if action == "split":
+            return self.split_cost(hand_index)
+        return 0
+
     def double_cost(self, hand_index: Optional[int] = None) -> int:
         index = self._resolve_hand_index(hand_index)
         if index is None or not self.can_double_hand(index):
@@ -290,6 +624,7 @@ class GameSession:
         elif value == 21:
             state.has_stood = True
             self._advance_hand(index)
+        self._changed()
 
     def player_stand(self, hand_index: Optional[int] = None) -> None:
         if self.is_over:
@@ -302,6 +637,7 @@ class GameSession:
             return
         state.has_stood = True
         self._advance_hand(index)
+        self._changed()
 
     def player_double(self, hand_index: Optional[int] = None) -> bool:
         if self.is_over:
@@ -318,6 +654,7 @@ class GameSession:
         if state.hand.value > 21:
             state.outcome = "player_bust"
         self._advance_hand(index)
+        self._changed()
         return True
 
     def player_split(self, hand_index: Optional[int] = None) -> bool:
@@ -330,6 +667,7 @@ class GameSession:
         if len(state.hand.cards) != 2:
             return False
         first_card, second_card = state.hand.cards
+        # Rebuilding the hand from its first card resets the running totals.
         state.hand = Hand(cards=[first_card])
         new_state = PlayerHandState(bet=state.bet)
         new_state.hand.add_card(second_card)
@@ -338,6 +676,7 @@ class GameSession:
         self.player_hands.insert(index + 1, new_state)
         if self.active_hand_index is not None and index < self.active_hand_index:
             self.active_hand_index += 1
+        self._changed()
         return True
 
     def _advance_hand(self, current_index: int) -> None:
@@ -388,9 +727,95 @@ class GameSession:
             return "dealer_win"
         return "mixed"
 
+    def payout(self) -> int:
+        """Total returned to the player for the round, stakes included."""
+        payout = 0
+        for hand_state in self.player_hands:
+            result = hand_state.outcome
+            bet_amount = hand_state.bet
+            if not result or bet_amount <= 0:
+                continue
+            if result == "player_blackjack":
+                payout += int(bet_amount * 2.5)
+            elif result in {"player_win", "dealer_bust"}:
+                payout += bet_amount * 2
+            elif result == "push":
+                payout += bet_amount
+        for side_result in self.side_bet_results.values():
+            payout += int(side_result.get("payout", 0))
+        return payout
+
+    def to_state(self) -> Dict[str, object]:
+        """Complete, JSON-compatible state, shoe included, for external stores."""
+        return {
+            "session_id": self.session_id,
+            "owner_id": self.owner_id,
+            "version": self.version,
+            "deck": self.deck.to_state(),
+            "dealer_cards": list(self.dealer_hand.cards),
+            "player_hands": [
+                {
+                    "cards": list(state.hand.cards),
+                    "bet": state.bet,
+                    "is_doubled": state.is_doubled,
+                    "has_stood": state.has_stood,
+                    "outcome": state.outcome,
+                }
+                for state in self.player_hands
+            ],
+            "active_hand_index": self.active_hand_index,
+            "is_over": self.is_over,
+            "outcome": self.outcome,
+            "is_settled": self.is_settled,
+            "side_bets": dict(self.side_bets),
+            "side_bet_results": self.side_bet_results,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, object]) -> "GameSession":
+        session = cls._blank(
+            str(state["session_id"]),
+            state["owner_id"],
+            shoe_from_state(state["deck"]),
+            int(state.get("version", 0)),
+        )
+        session.dealer_hand = Hand(cards=list(state["dealer_cards"]))
+        session.player_hands = [
+            PlayerHandState(
+                hand=Hand(cards=list(hand["cards"])),
+                bet=hand["bet"],
+                is_doubled=hand["is_doubled"],
+                has_stood=hand["has_stood"],
+                outcome=hand["outcome"],
+            )
+            for hand in state["player_hands"]
+        ]
+        session.active_hand_index = state["active_hand_index"]
+        session.is_over = state["is_over"]
+        session.outcome = state["outcome"]
+        session.is_settled = state["is_settled"]
+        session.side_bets = dict(state["side_bets"])
+        session.side_bet_results = {key: dict(value) for key, value in dict(state["side_bet_results"]).items()}
+        return session
+
     def serialize(self) -> Dict[str, object]:
+        """Public state of the session, cached until the next mutation."""
+        return self.cached("serialize", GameSession._remember_serialized)
+
+    def serialized_at(self, version: int) -> Optional[Dict[str, object]]:
+        """``serialize()`` output of an earlier version, if it is still remembered."""
+        return self._history.get(version)
+
+    def _remember_serialized(self) -> Dict[str, object]:
+        data = self._history[self.version] = self._build_serialized()
+        while len(self._history) > SERIALIZED_HISTORY:
+            self._history.popitem(last=False)
+        return data
+
+    def _build_serialized(self) -> Dict[str, object]:
         return {
             "session_id": self.session_id,
+            "version": self.version,
             "player_hands": [
                 state.to_dict(
                     is_active=(
@@ -402,7 +827,7 @@ class GameSession:
                 for index, state in enumerate(self.player_hands)
             ],
             "dealer_hand": {
-                "cards": [card.to_dict() for card in self.dealer_hand.cards],
+                "cards": [card_to_dict(card) for card in self.dealer_hand.cards],
                 "value": self.dealer_hand.value,
             },
             "is_over": self.is_over,
@@ -415,31 +840,348 @@ class GameSession:
         }
 
 
-class SessionManager:
-    """Stores active game sessions in memory."""
+class ShoePool:
+    """Bounded pool of pre-shuffled shoes kept filled by a background thread.
 
-    def __init__(self) -> None:
-        self._sessions: Dict[str, GameSession] = {}
+    ``acquire`` pops a ready shoe in O(1). Whenever the pool drops below the low
+    watermark the producer is woken up and refills it to the high watermark;
+    if the pool is empty the shoe is built inline on the caller's thread.
+    """
+
+    def __init__(
+        self,
+        deck_factory: Callable[[], Shoe] = Deck,
+        low_watermark: int = 16,
+        high_watermark: int = 64,
+    ) -> None:
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError("Watermarks must satisfy 0 <= low <= high.")
+        self._deck_factory = deck_factory
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._shoes: deque = deque()
         self._lock = Lock()
+        self._refill = Event()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+
+    def acquire(self) -> Shoe:
+        with self._lock:
+            if self._shoes:
+                shoe: Optional[Shoe] = self._shoes.popleft()
+                self.hits += 1
+            else:
+                shoe = None
+                self.misses += 1
+            low = len(self._shoes) < self.low_watermark
+        if low:
+            self._refill.set()
+        if shoe is None:
+            shoe = self._deck_factory()
+        return shoe
+
+    def fill(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                if len(self._shoes) >= self.high_watermark:
+                    return
+            shoe = self._deck_factory()
+            with self._lock:
+                self._shoes.append(shoe)
+                self.produced += 1
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._refill.set()
+
+        def _run() -> None:
+            while not self._stop.is_set():
+                self._refill.wait(timeout=1)
+                if self._refill.is_set():
+                    self._refill.clear()
+                    self.fill()
+
+        self._thread = Thread(target=_run, name="shoe-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._refill.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = len(self._shoes)
+        return {
+            "size": size,
+            "low_watermark": self.low_watermark,
+            "high_watermark": self.high_watermark,
+            "hits": self.hits,
+            "misses": self.misses,
+            "produced": self.produced,
+        }
+
+
+class _SessionShard:
+    """One lock-protected bucket of the session store."""
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.guest_sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self.owned_sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self.evictions: Dict[str, int] = {"expired": 0, "guest_lru": 0, "owned_lru": 0}
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        # Single dict reads are atomic, so lookups never take the shard lock.
+        session = self.guest_sessions.get(session_id)
+        if session is None:
+            session = self.owned_sessions.get(session_id)
+        return session
+
+    def evict_lru(self, store: "OrderedDict[str, GameSession]", limit: int, reason: str) -> None:
+        # Lookups only refresh ``last_access``; sessions used since they were
+        # queued get a second chance at the back instead of being evicted.
+        while len(store) > limit:
+            session_id, session = next(iter(store.items()))
+            if session.last_access > session.queued_at:
+                session.queued_at = session.last_access
+                store.move_to_end(session_id)
+                continue
+            del store[session_id]
+            self.evictions[reason] += 1
+
+    def sweep(self, cutoff: float) -> int:
+        removed = 0
+        for store in (self.guest_sessions, self.owned_sessions):
+            while store:
+                session_id, session = next(iter(store.items()))
+                if session.queued_at >= cutoff:
+                    break
+                if session.last_access >= cutoff:
+                    session.queued_at = session.last_access
+                    store.move_to_end(session_id)
+                    continue
+                del store[session_id]
+                removed += 1
+        self.evictions["expired"] += removed
+        return removed
+
+
+class SessionManager:
+    """Stores active game sessions in memory.
+
+    Sessions are spread over ``shards`` buckets by a hash of their id, each
+    with its own lock, so unrelated sessions never contend; lookups are
+    lock-free. Guest and owned sessions have separate caps enforced with
+    approximate LRU eviction, and sessions idle for longer than ``idle_ttl``
+    seconds are dropped by a sweep amortized over ``create_session`` calls,
+    or run by a background thread once ``start_sweeper`` is called.
+    """
+
+    def __init__(
+        self,
+        deck_factory: Callable[[], Shoe] = Deck,
+        shoe_pool: Optional[ShoePool] = None,
+        idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+        max_guest_sessions: int = MAX_GUEST_SESSIONS,
+        max_owned_sessions: int = MAX_OWNED_SESSIONS,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL_SECONDS,
+        shards: int = SESSION_SHARDS,
+    ) -> None:
+        self._shards = [_SessionShard() for _ in range(shards)]
+        self._deck_factory = deck_factory
+        self.shoe_pool = shoe_pool
+        self.idle_ttl = idle_ttl
+        self.max_guest_sessions = max_guest_sessions
+        self.max_owned_sessions = max_owned_sessions
+        self.sweep_interval = sweep_interval
+        self._sweep_lock = Lock()
+        self._last_sweep = time.monotonic()
+        self._sweeper: Optional[Thread] = None
+        self._stop_sweeper = Event()
+        # Sessions restored from a snapshot, decoded on first access: id ->
+        # (wall-clock last access, encoded record).
+        self._restored: Dict[str, Tuple[float, object]] = {}
+        self._restore_loader: Optional[Callable[[str, object], GameSession]] = None
+        self._restore_lock = Lock()
+        self._restored_expired = 0
+
+    def _shard(self, session_id: str) -> _SessionShard:
+        return self._shards[hash(session_id) % len(self._shards)]
 
     def create_session(
         self,
         bet: int = 0,
         owner_id: Optional[int] = None,
         side_bets: Optional[Dict[str, int]] = None,
+        deck: Optional[Shoe] = None,
     ) -> GameSession:
-        session = GameSession(bet=bet, owner_id=owner_id, side_bets=side_bets)
-        with self._lock:
-            self._sessions[session.session_id] = session
+        if deck is None:
+            deck = self.shoe_pool.acquire() if self.shoe_pool else self._deck_factory()
+        session = GameSession(bet=bet, owner_id=owner_id, side_bets=side_bets, deck=deck)
+        now = time.monotonic()
+        session.last_access = session.queued_at = now
+        if (
+            self._sweeper is None
+            and now - self._last_sweep >= self.sweep_interval
+            and self._sweep_lock.acquire(blocking=False)
+        ):
+            try:
+                self._sweep(now)
+            finally:
+                self._sweep_lock.release()
+        self._insert(session)
         return session
 
+    def _insert(self, session: GameSession) -> None:
+        shard = self._shard(session.session_id)
+        shard_count = len(self._shards)
+        with shard.lock:
+            if session.owner_id:
+                shard.owned_sessions[session.session_id] = session
+                shard.evict_lru(shard.owned_sessions, -(-self.max_owned_sessions // shard_count), "owned_lru")
+            else:
+                shard.guest_sessions[session.session_id] = session
+                shard.evict_lru(shard.guest_sessions, -(-self.max_guest_sessions // shard_count), "guest_lru")
+
     def get_session(self, session_id: str) -> Optional[GameSession]:
-        with self._lock:
-            return self._sessions.get(session_id)
+        session = self._shard(session_id).get(session_id)
+        if session is None:
+            if not self._restored:
+                return None
+            session = self._load_restored(session_id)
+            if session is None:
+                return None
+        now = time.monotonic()
+        if now - session.last_access > self.idle_ttl:
+            # Left for the next sweep to remove.
+            return None
+        session.last_access = now
+        return session
+
+    def restore(self, records: Dict[str, Tuple[float, object]], loader: Callable[[str, object], GameSession]) -> None:
+        """Register encoded sessions that ``loader`` decodes on their first access.
+
+        ``records`` maps session ids to their wall-clock last access and
+        encoded state. Only the sessions players come back to are rebuilt.
+        """
+        with self._restore_lock:
+            self._restored.update(records)
+            self._restore_loader = loader
+
+    def _load_restored(self, session_id: str) -> Optional[GameSession]:
+        with self._restore_lock:
+            entry = self._restored.pop(session_id, None)
+            if entry is None:
+                # Another thread may have decoded it in the meantime.
+                return self._shard(session_id).get(session_id)
+            last_access, record = entry
+            session = self._restore_loader(session_id, record)
+            session.last_access = session.queued_at = time.monotonic() - max(0.0, time.time() - last_access)
+            self._insert(session)
+            return session
+
+    def restored_records(self) -> List[Tuple[str, Tuple[float, object]]]:
+        """Restored sessions not decoded yet."""
+        with self._restore_lock:
+            return list(self._restored.items())
+
+    def sessions(self) -> List[GameSession]:
+        """Every session held in memory, for snapshots."""
+        sessions: List[GameSession] = []
+        for shard in self._shards:
+            with shard.lock:
+                sessions.extend(shard.guest_sessions.values())
+                sessions.extend(shard.owned_sessions.values())
+        return sessions
+
+    @contextmanager
+    def checkout(self, session_id: str) -> Iterator[Optional[GameSession]]:
+        """Hold the session's own lock for a whole action, balance updates included.
+
+        Actions on different sessions never wait on each other; concurrent
+        requests for the same session run one after the other.
+        """
+        session = self.get_session(session_id)
+        if session is None:
+            yield None
+            return
+        with session.lock:
+            yield session
 
     def remove_session(self, session_id: str) -> None:
-        with self._lock:
-            self._sessions.pop(session_id, None)
+        shard = self._shard(session_id)
+        with shard.lock:
+            shard.guest_sessions.pop(session_id, None)
+            shard.owned_sessions.pop(session_id, None)
+        if self._restored:
+            with self._restore_lock:
+                self._restored.pop(session_id, None)
+
+    def sweep(self) -> int:
+        """Drop every idle session now and return how many were removed."""
+        with self._sweep_lock:
+            return self._sweep(time.monotonic())
+
+    def start_sweeper(self) -> None:
+        """Sweep every ``sweep_interval`` seconds in a background thread instead of in ``create_session``."""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+
+        def _run() -> None:
+            while not self._stop_sweeper.wait(self.sweep_interval):
+                self.sweep()
+
+        self._sweeper = Thread(target=_run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop_sweeper.set()
+        if self._sweeper and self._sweeper.is_alive():
+            self._sweeper.join(timeout=1)
+        self._sweeper = None
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        cutoff = now - self.idle_ttl
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.sweep(cutoff)
+        if self._restored:
+            wall_cutoff = time.time() - self.idle_ttl
+            with self._restore_lock:
+                expired = [key for key, (last_access, _) in self._restored.items() if last_access < wall_cutoff]
+                for key in expired:
+                    del self._restored[key]
+                self._restored_expired += len(expired)
+            removed += len(expired)
+        self._last_sweep = now
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        evictions = {"expired": self._restored_expired, "guest_lru": 0, "owned_lru": 0}
+        guest_sessions = owned_sessions = 0
+        for shard in self._shards:
+            with shard.lock:
+                guest_sessions += len(shard.guest_sessions)
+                owned_sessions += len(shard.owned_sessions)
+                for reason, count in shard.evictions.items():
+                    evictions[reason] += count
+        return {
+            "guest_sessions": guest_sessions,
+            "owned_sessions": owned_sessions,
+            "restoring": len(self._restored),
+            "shards": len(self._shards),
+            "evictions": evictions,
+        }
 
 
-session_manager = SessionManager()
+shoe_pool = ShoePool(deck_factory=DECK_FACTORIES[DECK_MODE])
+session_manager = SessionManager(deck_factory=DECK_FACTORIES[DECK_MODE], shoe_pool=shoe_pool)
@@ -1,17 +1,27 @@
 """SQLite database utilities for user and token management."""
 from __future__ import annotations
 
+import asyncio
+import os
 import shutil
 import sqlite3
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
 DB_PATH = Path("data/blackjack.db")
 BACKUP_DIR = Path("data/backups")
 BACKUP_INTERVAL_SECONDS = 60
+# Queries are serialized on the single connection; game actions run on their own
+# executor (see ``app.main.run_action``), so a few threads are enough here.
+DB_THREADS = int(os.environ.get("BLACKJACK_DB_THREADS", "4"))
+
+T = TypeVar("T")
+
+executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
 
 _connection_lock = threading.Lock()
 _connection: Optional[sqlite3.Connection] = None
@@ -19,6 +29,11 @@ _backup_thread: Optional[threading.Thread] = None
 _stop_backup = threading.Event()
 
 
+async def run(func: Callable[..., T], *args: object) -> T:
+    """Run blocking database work on the dedicated executor and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
 def get_connection() -> sqlite3.Connection:
     global _connection
     if _connection is None:
@@ -89,6 +104,55 @@ def update_user_balance(user_id: int, new_balance: int) -> None:
         conn.commit()
 
 
+def adjust_user_balance(user_id: int, delta: int) -> Optional[int]:
+    """Add ``delta`` to the balance in one statement and return the new balance.
+
+    Returns ``None``, leaving the balance untouched, if the user does not
+    exist or the balance would become negative.
+    """
+    with _connection_lock:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET balance = balance + ? WHERE id = ? AND balance + ? >= 0",
+            (delta, user_id, delta),
+        )
+        if cursor.rowcount != 1:
+            conn.rollback()
+            return None
+        cursor.execute("SELECT balance FROM users WHERE id = ?", (user_id,))
+        balance = cursor.fetchone()["balance"]
+        conn.commit()
+        return balance
+
+
+def reserve_user_balance(user_id: int, minimum: int, limit: int) -> Optional[int]:
+    """Debit up to ``limit`` from the balance and return the amount debited.
+
+    Takes the whole balance when it is below ``limit``. Returns ``None``,
+    leaving the balance untouched, if the user does not exist or the balance
+    is below ``minimum``. The reservation is given back, with any winnings or
+    less any losses, through ``adjust_user_balance``.
+    """
+    with _connection_lock:
+        conn = get_connection()
+        cursor = conn.cursor()
+        while True:
+            cursor.execute("SELECT balance FROM users WHERE id = ?", (user_id,))
+            row = cursor.fetchone()
+            if row is None or row["balance"] < minimum:
+                return None
+            amount = min(row["balance"], limit)
+            # Only debited if no other connection changed the balance since it was read.
+            cursor.execute(
+                "UPDATE users SET balance = balance - ? WHERE id = ? AND balance = ?",
+                (amount, user_id, row["balance"]),
+            )
+            conn.commit()
+            if cursor.rowcount == 1:
+                return amount
+
+
 def save_token(token: str, user_id: int) -> None:
     with _connection_lock:
         conn = get_connection()
@@ -149,11 +213,16 @@ def stop_backup_thread() -> None:
 
 
 __all__ = [
+    "DB_THREADS",
+    "executor",
+    "run",
     "init_db",
     "create_user",
     "get_user_by_username",
     "get_user_by_id",
     "update_user_balance",
+    "adjust_user_balance",
+    "reserve_user_balance",
     "save_token",
     "get_token",
     "delete_token",
@@ -0,0 +1,150 @@
+"""In-process pub/sub of session states for Server-Sent Events subscribers.
+
+Game actions publish the state they produced, balance included, once per
+action. The Server-Sent Events frame is encoded once and handed to every
+subscriber of the session, so observers cost no database reads or extra
+encoding. Subscribers only keep the latest frame: a slow client skips
+intermediate states instead of buffering them.
+
+The hub only sees actions handled by its own process. Observers must reach
+the worker that owns the session, which worker-affine routing already
+guarantees for ``/game/{session_id}`` paths.
+"""
+from __future__ import annotations
+
+import asyncio
+import signal
+import threading
+from threading import Lock
+from typing import Dict, Optional, Set
+
+from .blackjack import GameSession
+from .responses import game_state_json
+
+HEARTBEAT_SECONDS = 15
+KEEP_ALIVE = b": keep-alive\n\n"
+
+
+def state_event(session: GameSession, balance: Optional[int]) -> bytes:
+    """``state`` event carrying the JSON game state, with its version as event id."""
+    return b"event: state\nid: %d\ndata: %s\n\n" % (session.version, game_state_json(session, balance))
+
+
+class Subscriber:
+    """One event stream, consumed on the event loop that created it."""
+
+    def __init__(self, session_id: str, loop: asyncio.AbstractEventLoop) -> None:
+        self.session_id = session_id
+        self.loop = loop
+        self.closed = False
+        self._frame: Optional[bytes] = None
+        self._ready = asyncio.Event()
+
+    def _offer(self, frame: Optional[bytes]) -> None:
+        if frame is None:
+            self.closed = True
+        else:
+            self._frame = frame
+        self._ready.set()
+
+    async def next(self, timeout: float = HEARTBEAT_SECONDS) -> Optional[bytes]:
+        """Latest unseen frame, or ``None`` after ``timeout`` seconds without one."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+class SessionEventHub:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+
+    def subscribe(self, session_id: str) -> Subscriber:
+        subscriber = Subscriber(session_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(session_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.session_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.session_id]
+
+    def has_subscribers(self, session_id: str) -> bool:
+        return session_id in self._subscribers
+
+    def publish(self, session_id: str, frame: bytes) -> int:
+        """Hand ``frame`` to every subscriber of the session; safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber._offer, frame)
+            except RuntimeError:
+                # Its event loop is gone; the stream can never be read again.
+                self.unsubscribe(subscriber)
+        return len(subscribers)
+
+    def close(self) -> None:
+        """End every stream, so shutdown does not wait on open connections."""
+        with self._lock:
+            subscribers = [subscriber for group in self._subscribers.values() for subscriber in group]
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            if not subscriber.loop.is_closed():
+                subscriber.loop.call_soon_threadsafe(subscriber._offer, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._subscribers),
+                "subscribers": sum(len(group) for group in self._subscribers.values()),
+            }
+
+
+session_events = SessionEventHub()
+
+
+def close_on_exit_signals() -> None:
+    """End every stream as soon as the server is asked to stop.
+
+    Servers let open responses finish before running shutdown handlers, and
+    event streams never finish on their own. This wraps the handlers the
+    server installed for SIGINT and SIGTERM; it must run on the event loop
+    thread, for instance from a startup handler.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(number, frame, previous=previous):
+            # Handlers interrupt the loop thread, which may hold the hub lock: defer to the loop.
+            loop.call_soon_threadsafe(session_events.close)
+            previous(number, frame)
+
+        signal.signal(signum, handler)
+
+
+__all__ = [
+    "HEARTBEAT_SECONDS",
+    "KEEP_ALIVE",
+    "SessionEventHub",
+    "Subscriber",
+    "close_on_exit_signals",
+    "session_events",
+    "state_event",
+]
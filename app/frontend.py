@@ -1372,9 +1372,11 @@ INDEX_HTML = """
       }
 
       async function postJson(path, body, headers = {}) {
+        // Lets a front proxy route the request to the worker owning the session.
+        const sessionHeaders = body && body.session_id ? { 'X-Session-Id': body.session_id } : {};
         const response = await fetch(path, {
           method: 'POST',
-          headers: { 'Content-Type': 'application/json', ...headers },
+          headers: { 'Content-Type': 'application/json', ...sessionHeaders, ...headers },
           body: JSON.stringify(body),
         });
         if (!response.ok) {
@@ -1390,7 +1392,143 @@ INDEX_HTML = """
         return response.json();
       }
 
+      // Game actions go over a single WebSocket; plain HTTP is the fallback.
+      class SocketUnavailable extends Error {}
+
+      const gameSocket = {
+        ready: null,
+        nextId: 1,
+        pending: new Map(),
+        retryAt: 0,
+        connect() {
+          if (this.ready) {
+            return this.ready;
+          }
+          if (!('WebSocket' in window) || Date.now() < this.retryAt) {
+            return Promise.reject(new SocketUnavailable());
+          }
+          const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+          const socket = new WebSocket(`${protocol}//${window.location.host}/ws/game`);
+          socket.addEventListener('message', (event) => this.receive(event.data));
+          this.ready = new Promise((resolve, reject) => {
+            socket.addEventListener('open', () => resolve(socket));
+            socket.addEventListener('close', () => {
+              this.reset();
+              reject(new SocketUnavailable());
+            });
+          });
+          return this.ready;
+        },
+        reset() {
+          this.ready = null;
+          this.retryAt = Date.now() + 5000;
+          // These actions were sent and may have been played: never replay them over HTTP.
+          this.pending.forEach(({ reject }) => reject(new Error('Connexion interrompue, vérifiez la main en cours.')));
+          this.pending.clear();
+        },
+        receive(text) {
+          const message = JSON.parse(text);
+          const entry = this.pending.get(message.id);
+          if (!entry) {
+            return;
+          }
+          this.pending.delete(message.id);
+          if (!message.error) {
+            entry.resolve(message.state);
+          } else if (message.error.status === 421) {
+            // Session owned by another worker: HTTP requests are routed to it.
+            entry.reject(new SocketUnavailable());
+          } else {
+            const detail = message.error.detail;
+            entry.reject(new Error(typeof detail === 'string' ? detail : JSON.stringify(detail)));
+          }
+        },
+        async request(type, body) {
+          const socket = await this.connect();
+          const id = this.nextId++;
+          return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject });
+            socket.send(JSON.stringify({ ...body, type, id }));
+          });
+        },
+      };
+
+      async function sendGameAction(type, path, body) {
+        // For the session on screen, only the changes since its version are needed.
+        const request =
+          lastState && body.session_id && body.session_id === lastState.session_id
+            ? { ...body, since_version: lastState.version }
+            : body;
+        try {
+          return await gameSocket.request(type, request);
+        } catch (error) {
+          if (!(error instanceof SocketUnavailable)) {
+            throw error;
+          }
+          return postJson(path, request);
+        }
+      }
+
+      function applyHandDelta(hand, change) {
+        const { new_cards: newCards, index, ...fields } = change;
+        const base = hand || { cards: [] };
+        const updated = { ...base, ...fields };
+        if (newCards) {
+          updated.cards = [...base.cards, ...newCards];
+        }
+        return updated;
+      }
+
+      function applyStateDelta(base, delta) {
+        if (!base || base.session_id !== delta.session_id || base.version !== delta.since_version) {
+          return null;
+        }
+        const { since_version: sinceVersion, player_hands: hands, dealer_hand: dealer, side_bets: sideBets, ...fields } =
+          delta;
+        const state = { ...base, ...fields };
+        if (dealer) {
+          state.dealer_hand = applyHandDelta(base.dealer_hand, dealer);
+        }
+        if (hands) {
+          state.player_hands = base.player_hands.slice(0, hands.count);
+          hands.changed.forEach((change) => {
+            state.player_hands[change.index] = applyHandDelta(state.player_hands[change.index], change);
+          });
+        }
+        if (sideBets) {
+          state.side_bets = { ...base.side_bets };
+          Object.entries(sideBets).forEach(([key, entry]) => {
+            if (entry === null) {
+              delete state.side_bets[key];
+            } else {
+              state.side_bets[key] = entry;
+            }
+          });
+        }
+        return state;
+      }
+
+      async function refreshGameState(id) {
+        try {
+          const response = await fetch(`/game/${encodeURIComponent(id)}`);
+          if (response.ok) {
+            handleGameState(await response.json());
+          }
+        } catch (error) {
+          setStatus('Impossible de récupérer la main en cours.', 'error');
+        }
+      }
+
       function handleGameState(data) {
+        if (data.since_version !== undefined) {
+          const state = applyStateDelta(lastState, data);
+          if (!state) {
+            // The delta is against a state this page no longer shows.
+            refreshGameState(data.session_id);
+            return lastState;
+          }
+          data = state;
+        }
         sessionId = data.session_id;
         lastState = data;
         const shortId = sessionId ? sessionId.slice(0, 8) : '—';
@@ -1460,7 +1598,18 @@ INDEX_HTML = """
             persistCredits(credits - total);
           }
           lastResolvedSession = null;
-          const data = await postJson('/game/start', { bet: mainBet, side_bets: sideBetsPayload });
+          const payload = { bet: mainBet, side_bets: sideBetsPayload };
+          let data = null;
+          if (sessionId && lastState && lastState.is_over) {
+            try {
+              data = await sendGameAction('next', '/game/next', { ...payload, session_id: sessionId });
+            } catch (err) {
+              data = null;
+            }
+          }
+          if (!data) {
+            data = await sendGameAction('start', '/game/start', payload);
+          }
           handleGameState(data);
           clearChipSelection();
           setStatus('Cartes distribuées — bonne chance !', 'success');
@@ -1476,7 +1625,7 @@ INDEX_HTML = """
           return;
         }
         try {
-          const data = await postJson('/game/hit', {
+          const data = await sendGameAction('hit', '/game/hit', {
             session_id: sessionId,
             hand_index: lastState.active_hand_index,
           });
@@ -1493,7 +1642,7 @@ INDEX_HTML = """
           return;
         }
         try {
-          const data = await postJson('/game/stand', {
+          const data = await sendGameAction('stand', '/game/stand', {
             session_id: sessionId,
             hand_index: lastState.active_hand_index,
           });
@@ -1522,7 +1671,7 @@ INDEX_HTML = """
         const previousCredits = credits;
         try {
           persistCredits(credits - cost);
-          const data = await postJson('/game/double', {
+          const data = await sendGameAction('double', '/game/double', {
             session_id: sessionId,
             hand_index: lastState.active_hand_index,
           });
@@ -1552,7 +1701,7 @@ INDEX_HTML = """
         const previousCredits = credits;
         try {
           persistCredits(credits - cost);
-          const data = await postJson('/game/split', {
+          const data = await sendGameAction('split', '/game/split', {
             session_id: sessionId,
             hand_index: lastState.active_hand_index,
           });
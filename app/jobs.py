@@ -0,0 +1,138 @@
+"""Multi-core simulation jobs with deterministic shards and resumable checkpoints.
+
+A job splits its rounds into fixed shards, each seeded from
+``SeedSequence(seed).spawn``, so the merged result only depends on the job
+parameters and not on the number of worker processes or on restarts. Finished
+shards are written to a JSON checkpoint as soon as they complete.
+
+Run from the repository root, for example::
+
+    python -m app.jobs --rounds 50000000 --strategy dealer --checkpoint data/jobs/dealer.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .simulation import STRATEGIES, SimulationResult, simulate
+
+DEFAULT_SHARD_ROUNDS = 1_000_000
+
+
+@dataclass
+class SimulationJob:
+    """Parameters of a simulation job; they identify its checkpoint."""
+
+    rounds: int
+    strategy: str = "dealer"
+    bet: int = 10
+    side_bets: Dict[str, int] = field(default_factory=dict)
+    seed: int = 0
+    shard_rounds: int = DEFAULT_SHARD_ROUNDS
+
+    @property
+    def shard_count(self) -> int:
+        return -(-self.rounds // self.shard_rounds)
+
+    def shard_size(self, index: int) -> int:
+        return min(self.shard_rounds, self.rounds - index * self.shard_rounds)
+
+
+def run_shard(job: SimulationJob, index: int) -> Dict[str, object]:
+    """Play one shard; executed in a worker process."""
+    sequence = np.random.SeedSequence(job.seed).spawn(job.shard_count)[index]
+    result = simulate(
+        job.shard_size(index),
+        STRATEGIES[job.strategy],
+        bet=job.bet,
+        side_bets=job.side_bets,
+        rng=np.random.default_rng(sequence),
+    )
+    return result.to_dict()
+
+
+def _load_checkpoint(path: Path, job: SimulationJob) -> Dict[int, Dict[str, object]]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text())
+    if data.get("job") != asdict(job):
+        raise ValueError(f"Checkpoint {path} belongs to a different job.")
+    return {int(index): shard for index, shard in data.get("shards", {}).items()}
+
+
+def _save_checkpoint(path: Path, job: SimulationJob, shards: Dict[int, Dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(path.suffix + ".tmp")
+    temporary.write_text(
+        json.dumps({"job": asdict(job), "shards": {str(index): shard for index, shard in sorted(shards.items())}})
+    )
+    os.replace(temporary, path)
+
+
+def merge_shards(job: SimulationJob, shards: Dict[int, Dict[str, object]]) -> SimulationResult:
+    result = SimulationResult(bet=job.bet)
+    # Merge in shard order so the floating-point result is reproducible.
+    for index in sorted(shards):
+        result.merge(SimulationResult.from_dict(shards[index]))
+    return result
+
+
+def run_job(
+    job: SimulationJob,
+    checkpoint: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> SimulationResult:
+    """Run every shard not already in ``checkpoint`` on a process pool."""
+    if job.strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{job.strategy}'.")
+    shards = _load_checkpoint(checkpoint, job) if checkpoint else {}
+    pending: List[int] = [index for index in range(job.shard_count) if index not in shards]
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_shard, job, index): index for index in pending}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shards[futures.pop(future)] = future.result()
+                if checkpoint:
+                    _save_checkpoint(checkpoint, job, shards)
+    return merge_shards(job, shards)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a Blackjack simulation job on every core.")
+    parser.add_argument("--rounds", type=int, required=True)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="dealer")
+    parser.add_argument("--bet", type=int, default=10)
+    parser.add_argument("--side-bet", action="append", default=[], metavar="KEY=AMOUNT")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shard-rounds", type=int, default=DEFAULT_SHARD_ROUNDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    side_bets = {}
+    for entry in args.side_bet:
+        key, _, amount = entry.partition("=")
+        side_bets[key] = int(amount)
+    job = SimulationJob(
+        rounds=args.rounds,
+        strategy=args.strategy,
+        bet=args.bet,
+        side_bets=side_bets,
+        seed=args.seed,
+        shard_rounds=args.shard_rounds,
+    )
+    result = run_job(job, checkpoint=args.checkpoint, workers=args.workers)
+    print(json.dumps(result.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
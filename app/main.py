@@ -1,47 +1,90 @@
 """FastAPI application exposing the Blackjack API."""
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 import sqlite3
-from typing import Optional
-
-from fastapi import Depends, FastAPI, Header, HTTPException, status
-
-from . import db
-from .auth import authenticate, generate_token, hash_password, verify_password
-from .blackjack import GameSession, session_manager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from . import db, snapshots, strategy
+from .auth import authenticate, generate_token, hash_password_async, verify_password_async
+from .autoplay import run_autoplay
+from .blackjack import MAX_PLAYER_HANDS, WORKER_ID, GameSession, SessionManager, shoe_pool
 from .schemas import (
+    AutoplayRequest,
     GameActionRequest,
+    GameBatchRequest,
+    GameBatchResponse,
     GameHandActionRequest,
+    GameNextRoundRequest,
+    GameSessionRequest,
     GameStartRequest,
     GameStateResponse,
+    HintResponse,
     LoginRequest,
     SignupRequest,
     TokenResponse,
 )
+from .events import KEEP_ALIVE, close_on_exit_signals, session_events, state_event
 from .frontend import router as frontend_router
+from .responses import accepts_msgpack, game_state_delta_body, game_state_json, game_state_response, state_delta
+from .routing import WorkerAffinityMiddleware, session_worker
+from .session_store import SessionConflictError, session_manager
 
 app = FastAPI(title="OpenBlackJack", description="Single-player Blackjack API")
 app.include_router(frontend_router)
+app.add_middleware(WorkerAffinityMiddleware)
+
+T = TypeVar("T")
+
+SESSION_CONFLICT_DETAIL = "Session was changed by another request; nothing was saved."
+
 
+# Without a user, actions only reach guest sessions (see ``ensure_owner``) and never
+# the database; with in-process sessions they are then quick enough for the event loop.
+# Creating a session is not: it may build a shoe and evict others, so starts never run inline.
+INLINE_GUEST_ACTIONS = isinstance(session_manager, SessionManager)
 
-def optional_user(authorization: Optional[str] = Header(default=None)) -> Optional[sqlite3.Row]:
+# Actions wait on their session's lock (or claim, with a shared backend) while holding
+# a thread; they get their own pool so that token lookups on ``db.executor`` never
+# queue behind a busy session.
+ACTION_THREADS = int(os.environ.get("BLACKJACK_ACTION_THREADS", "16"))
+
+action_executor = ThreadPoolExecutor(max_workers=ACTION_THREADS, thread_name_prefix="action")
+
+
+async def optional_user(authorization: Optional[str] = Header(default=None)) -> Optional[sqlite3.Row]:
     if not authorization:
         return None
     if not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token format.")
     token = authorization.split()[1]
-    user = authenticate(token)
+    user = await db.run(authenticate, token)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token.")
     return user
 
 
-def require_user(user: Optional[sqlite3.Row] = Depends(optional_user)) -> sqlite3.Row:
+async def require_user(user: Optional[sqlite3.Row] = Depends(optional_user)) -> sqlite3.Row:
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required.")
     return user
 
 
+@app.exception_handler(SessionConflictError)
+async def session_conflict(request: Request, exc: SessionConflictError) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": SESSION_CONFLICT_DETAIL})
+
+
 def ensure_owner(session: GameSession, user: Optional[sqlite3.Row]) -> None:
     if session.owner_id and (user is None or session.owner_id != user["id"]):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session does not belong to you.")
@@ -50,84 +93,271 @@ def ensure_owner(session: GameSession, user: Optional[sqlite3.Row]) -> None:
 def settle_session(session: GameSession) -> Optional[int]:
     if not session.owner_id or not session.is_over or session.is_settled:
         return None
-    user = db.get_user_by_id(session.owner_id)
-    if user is None:
-        session.is_settled = True
-        return None
-    balance = user["balance"]
-    payout = 0
-    for hand_state in session.player_hands:
-        result = hand_state.outcome
-        bet_amount = hand_state.bet
-        if not result or bet_amount <= 0:
-            continue
-        if result == "player_blackjack":
-            payout += int(bet_amount * 2.5)
-        elif result in {"player_win", "dealer_bust"}:
-            payout += bet_amount * 2
-        elif result == "push":
-            payout += bet_amount
-    for side_result in session.side_bet_results.values():
-        payout += int(side_result.get("payout", 0))
-    new_balance = balance + payout
-    db.update_user_balance(session.owner_id, new_balance)
-    session.is_settled = True
+    # Relative updates: the owner's other sessions may move the balance concurrently.
+    new_balance = db.adjust_user_balance(session.owner_id, session.payout())
+    session.mark_settled()
     return new_balance
 
 
-def serialize_session(session: GameSession, balance: Optional[int]) -> GameStateResponse:
-    data = session.serialize()
-    return GameStateResponse(
-        session_id=data["session_id"],
-        player_hands=data["player_hands"],
-        dealer_hand=data["dealer_hand"],
-        is_over=data["is_over"],
-        outcome=data["outcome"],
-        bet=data["bet"],
-        balance=balance,
-        active_hand_index=data["active_hand_index"],
-        side_bets=data["side_bets"],
+def serialize_session(
+    session: GameSession,
+    balance: Optional[int],
+    request: Request,
+    headers: Optional[Dict[str, str]] = None,
+    extra: Optional[Dict[str, object]] = None,
+    since_version: Optional[int] = None,
+) -> Response:
+    # Encoded directly in the negotiated format; response_model only documents the schema.
+    return game_state_response(
+        session, balance, request.headers.get("accept"), headers=headers, extra=extra, since_version=since_version
+    )
+
+
+# A render callback turns the outcome of an action into the reply of its transport.
+# It runs while the session is still checked out, so it sees a consistent state.
+Render = Callable[[GameSession, Optional[int], Optional[Dict[str, object]]], T]
+
+# Messages of actions that take an extra stake: (illegal move, balance too low).
+_WAGER_MESSAGES = {
+    "double": ("Double impossible sur cette main.", "Solde insuffisant pour doubler."),
+    "split": ("Split impossible sur cette main.", "Solde insuffisant pour séparer."),
+}
+
+
+def http_render(request: Request, since_version: Optional[int] = None) -> Render[Response]:
+    return lambda session, balance, extra: serialize_session(
+        session, balance, request, extra=extra, since_version=since_version
     )
 
 
+def found_session(session: Optional[GameSession], user: Optional[sqlite3.Row]) -> GameSession:
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+    ensure_owner(session, user)
+    return session
+
+
+def finish_action(session: GameSession, balance: Optional[int]) -> Optional[int]:
+    """Settle a finished round, publish the new state and return the balance to report."""
+    if session.is_over:
+        balance = settle_session(session) or balance
+        if session.owner_id and balance is None:
+            refreshed = db.get_user_by_id(session.owner_id)
+            balance = refreshed["balance"] if refreshed else None
+    if session_events.has_subscribers(session.session_id):
+        session_events.publish(session.session_id, state_event(session, balance))
+    return balance
+
+
+def play_start(payload: GameStartRequest, user: Optional[sqlite3.Row], render: Render[T]) -> T:
+    bet = max(0, payload.bet or 0)
+    side_bets = {key: max(0, int(value)) for key, value in payload.side_bets.items()}
+    balance: Optional[int] = None
+    owner_id: Optional[int] = None
+
+    total_wager = bet + sum(side_bets.values())
+    if user:
+        owner_id = user["id"]
+        balance = db.adjust_user_balance(owner_id, -total_wager)
+        if balance is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bet exceeds available balance.",
+            )
+    try:
+        session = session_manager.create_session(
+            bet=bet,
+            owner_id=owner_id,
+            side_bets=side_bets,
+        )
+    except ValueError as exc:
+        if owner_id:
+            db.adjust_user_balance(owner_id, total_wager)
+        # Raised by stores with a fixed record size for bets they cannot hold.
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from None
+
+    return render(session, finish_action(session, balance), None)
+
+
+def play_next(payload: GameNextRoundRequest, user: Optional[sqlite3.Row], render: Render[T]) -> T:
+    with session_manager.checkout(payload.session_id) as session:
+        session = found_session(session, user)
+        if not session.is_over:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La main en cours n'est pas terminée.")
+        settle_session(session)
+
+        bet = max(0, payload.bet or 0)
+        side_bets = {key: max(0, int(value)) for key, value in payload.side_bets.items()}
+        balance: Optional[int] = None
+
+        if session.owner_id:
+            balance = db.adjust_user_balance(session.owner_id, -(bet + sum(side_bets.values())))
+            if balance is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Bet exceeds available balance.",
+                )
+        session.next_round(bet=bet, side_bets=side_bets)
+
+        return render(session, finish_action(session, balance), None)
+
+
+def play_move(action: str, payload: GameActionRequest, user: Optional[sqlite3.Row], render: Render[T]) -> T:
+    """Hit, stand, double or split, debiting the extra stake of the last two."""
+    with session_manager.checkout(payload.session_id) as session:
+        session = found_session(session, user)
+
+        balance: Optional[int] = None
+        if action in _WAGER_MESSAGES:
+            impossible, insufficient = _WAGER_MESSAGES[action]
+            cost = session.action_cost(action, payload.hand_index)
+            if cost <= 0:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=impossible)
+            if session.owner_id:
+                balance = db.adjust_user_balance(session.owner_id, -cost)
+                if balance is None:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=insufficient)
+            move = session.player_double if action == "double" else session.player_split
+            if not move(payload.hand_index):
+                if session.owner_id:
+                    db.adjust_user_balance(session.owner_id, cost)
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=impossible)
+        elif action == "hit":
+            session.player_hit(payload.hand_index)
+        else:
+            session.player_stand(payload.hand_index)
+
+        return render(session, finish_action(session, balance), None)
+
+
+def play_batch(payload: GameBatchRequest, user: Optional[sqlite3.Row], render: Render[T]) -> T:
+    with session_manager.checkout(payload.session_id) as session:
+        session = found_session(session, user)
+
+        # Dry run on a copy: an illegal step or a short balance leaves the session untouched.
+        trial = GameSession.from_state(session.to_state())
+        total_cost = 0
+        for position, step in enumerate(payload.actions, start=1):
+            total_cost += trial.action_cost(step.action, step.hand_index)
+            try:
+                trial.apply_action(step.action, step.hand_index)
+            except ValueError as exc:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Étape {position} : {exc}") from None
+
+        balance: Optional[int] = None
+        if session.owner_id:
+            balance = db.adjust_user_balance(session.owner_id, -total_cost)
+            if balance is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solde insuffisant pour ces actions.")
+
+        # Shoes are deterministic, so the session replays exactly what the copy did.
+        steps = []
+        for step in payload.actions:
+            cost = session.action_cost(step.action, step.hand_index)
+            index = session.apply_action(step.action, step.hand_index)
+            hand_state = session.player_hands[index]
+            steps.append(
+                {
+                    "action": step.action,
+                    "hand_index": index,
+                    "cost": cost,
+                    "value": hand_state.hand.value,
+                    "result": hand_state.outcome,
+                }
+            )
+
+        return render(session, finish_action(session, balance), {"steps": steps})
+
+
+def read_state(session_id: str, user: Optional[sqlite3.Row], render: Render[T]) -> T:
+    with session_manager.checkout(session_id) as session:
+        session = found_session(session, user)
+        balance = None
+        if session.owner_id:
+            record = db.get_user_by_id(session.owner_id)
+            balance = record["balance"] if record else None
+        return render(session, balance, None)
+
+
+async def run_action(user: Optional[sqlite3.Row], action: Callable[..., T], *args: object) -> T:
+    """Run a play helper on the event loop for guests, on the action executor otherwise.
+
+    Helpers run start to finish in one place, so a session is never held
+    checked out across an ``await``.
+    """
+    if user is None and INLINE_GUEST_ACTIONS:
+        return action(*args)
+    return await run_in_action_thread(action, *args)
+
+
+async def run_in_action_thread(action: Callable[..., T], *args: object) -> T:
+    return await asyncio.get_running_loop().run_in_executor(action_executor, action, *args)
+
+
 @app.on_event("startup")
 def on_startup() -> None:
     db.init_db()
     db.start_backup_thread()
+    strategy.get_table()
+    shoe_pool.start()
+    close_on_exit_signals()
+    # Shared backends persist sessions themselves; in-process ones are snapshotted.
+    if isinstance(session_manager, SessionManager):
+        snapshots.restore_snapshot(session_manager)
+        snapshots.start_snapshot_thread(session_manager)
+        # Keeps the amortized sweep out of session creation.
+        session_manager.start_sweeper()
 
 
 @app.on_event("shutdown")
 def on_shutdown() -> None:
+    session_events.close()
+    shoe_pool.stop()
     db.stop_backup_thread()
+    if isinstance(session_manager, SessionManager):
+        session_manager.stop_sweeper()
+        snapshots.stop_snapshot_thread()
+        snapshots.write_snapshot(session_manager)
 
 
 @app.get("/health")
-def health_check() -> dict:
-    return {"status": "ok"}
+async def health_check() -> dict:
+    # Only in-process statistics are cheap enough to gather on the event loop.
+    return await run_action(None, health_stats)
+
+
+def health_stats() -> dict:
+    return {
+        "status": "ok",
+        "worker_id": WORKER_ID or None,
+        "shoe_pool": shoe_pool.stats(),
+        "sessions": session_manager.stats(),
+        "event_subscribers": session_events.stats(),
+    }
 
 
 @app.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def signup(payload: SignupRequest) -> TokenResponse:
-    existing = db.get_user_by_username(payload.username)
+async def signup(payload: SignupRequest) -> TokenResponse:
+    existing = await db.run(db.get_user_by_username, payload.username)
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists.")
-    password_hash = hash_password(payload.password)
-    user_id = db.create_user(payload.username, password_hash)
-    token = generate_token(user_id)
+    password_hash = await hash_password_async(payload.password)
+    user_id = await db.run(db.create_user, payload.username, password_hash)
+    token = await db.run(generate_token, user_id)
     return TokenResponse(token=token)
 
 
 @app.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest) -> TokenResponse:
-    user = db.get_user_by_username(payload.username)
-    if not user or not verify_password(payload.password, user["password_hash"]):
+async def login(payload: LoginRequest) -> TokenResponse:
+    user = await db.run(db.get_user_by_username, payload.username)
+    if not user or not await verify_password_async(payload.password, user["password_hash"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials.")
-    token = generate_token(user["id"])
+    token = await db.run(generate_token, user["id"])
     return TokenResponse(token=token)
 
 
 @app.get("/me")
-def current_user(user: sqlite3.Row = Depends(require_user)) -> dict:
+async def current_user(user: sqlite3.Row = Depends(require_user)) -> dict:
     return {
         "id": user["id"],
         "username": user["username"],
@@ -137,170 +367,296 @@ def current_user(user: sqlite3.Row = Depends(require_user)) -> dict:
 
 
 @app.post("/game/start", response_model=GameStateResponse)
-def start_game(
+async def start_game(
     payload: GameStartRequest,
+    request: Request,
     user: Optional[sqlite3.Row] = Depends(optional_user),
-) -> GameStateResponse:
-    bet = max(0, payload.bet or 0)
-    side_bets = {key: max(0, int(value)) for key, value in payload.side_bets.items()}
-    balance: Optional[int] = None
-    owner_id: Optional[int] = None
-
-    if user:
-        owner_id = user["id"]
-        current_balance = user["balance"]
-        total_wager = bet + sum(side_bets.values())
-        if total_wager > current_balance:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Bet exceeds available balance.",
-            )
-        if total_wager > 0:
-            db.update_user_balance(owner_id, current_balance - total_wager)
-            balance = current_balance - total_wager
-        else:
-            balance = current_balance
-    session = session_manager.create_session(
-        bet=bet,
-        owner_id=owner_id,
-        side_bets=side_bets,
-    )
+) -> Response:
+    return await run_in_action_thread(play_start, payload, user, http_render(request))
 
-    if session.is_over:
-        balance = settle_session(session) or balance
-        if owner_id and balance is None:
-            refreshed = db.get_user_by_id(owner_id)
-            balance = refreshed["balance"] if refreshed else None
 
-    return serialize_session(session, balance)
+@app.post("/game/next", response_model=GameStateResponse)
+async def next_round(
+    payload: GameNextRoundRequest,
+    request: Request,
+    user: Optional[sqlite3.Row] = Depends(optional_user),
+) -> Response:
+    return await run_action(user, play_next, payload, user, http_render(request, payload.since_version))
 
 
 @app.post("/game/hit", response_model=GameStateResponse)
-def hit(
+async def hit(
     payload: GameActionRequest,
+    request: Request,
     user: Optional[sqlite3.Row] = Depends(optional_user),
-) -> GameStateResponse:
-    session = session_manager.get_session(payload.session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-    ensure_owner(session, user)
-
-    session.player_hit(payload.hand_index)
-
-    balance = None
-    if session.is_over:
-        balance = settle_session(session)
-        if session.owner_id and balance is None:
-            refreshed = db.get_user_by_id(session.owner_id)
-            balance = refreshed["balance"] if refreshed else None
-
-    return serialize_session(session, balance)
+) -> Response:
+    return await run_action(user, play_move, "hit", payload, user, http_render(request, payload.since_version))
 
 
 @app.post("/game/stand", response_model=GameStateResponse)
-def stand(
+async def stand(
     payload: GameActionRequest,
+    request: Request,
     user: Optional[sqlite3.Row] = Depends(optional_user),
-) -> GameStateResponse:
-    session = session_manager.get_session(payload.session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-    ensure_owner(session, user)
-
-    session.player_stand(payload.hand_index)
-
-    balance = None
-    if session.is_over:
-        balance = settle_session(session)
-        if session.owner_id and balance is None:
-            refreshed = db.get_user_by_id(session.owner_id)
-            balance = refreshed["balance"] if refreshed else None
-
-    return serialize_session(session, balance)
+) -> Response:
+    return await run_action(user, play_move, "stand", payload, user, http_render(request, payload.since_version))
 
 
 @app.post("/game/double", response_model=GameStateResponse)
-def double(
+async def double(
     payload: GameHandActionRequest,
+    request: Request,
     user: Optional[sqlite3.Row] = Depends(optional_user),
-) -> GameStateResponse:
-    session = session_manager.get_session(payload.session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-    ensure_owner(session, user)
+) -> Response:
+    return await run_action(user, play_move, "double", payload, user, http_render(request, payload.since_version))
 
-    cost = session.double_cost(payload.hand_index)
-    if cost <= 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Double impossible sur cette main.")
 
-    balance: Optional[int] = None
-    if session.owner_id:
-        record = db.get_user_by_id(session.owner_id)
-        if not record or record["balance"] < cost:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solde insuffisant pour doubler.")
-        new_balance = record["balance"] - cost
-        db.update_user_balance(session.owner_id, new_balance)
-        balance = new_balance
+@app.post("/game/split", response_model=GameStateResponse)
+async def split(
+    payload: GameHandActionRequest,
+    request: Request,
+    user: Optional[sqlite3.Row] = Depends(optional_user),
+) -> Response:
+    return await run_action(user, play_move, "split", payload, user, http_render(request, payload.since_version))
 
-    if not session.player_double(payload.hand_index):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Double impossible sur cette main.")
 
-    if session.is_over:
-        balance = settle_session(session) or balance
-        if session.owner_id and balance is None:
-            refreshed = db.get_user_by_id(session.owner_id)
-            balance = refreshed["balance"] if refreshed else None
+@app.post("/game/batch", response_model=GameBatchResponse)
+async def batch(
+    payload: GameBatchRequest,
+    request: Request,
+    user: Optional[sqlite3.Row] = Depends(optional_user),
+) -> Response:
+    return await run_action(user, play_batch, payload, user, http_render(request, payload.since_version))
 
-    return serialize_session(session, balance)
 
+@app.post(
+    "/game/autoplay",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "Running statistics, one JSON object per line."}},
+)
+async def autoplay(payload: AutoplayRequest, user: sqlite3.Row = Depends(require_user)) -> StreamingResponse:
+    side_bets = {key: max(0, int(value)) for key, value in payload.side_bets.items()}
+    stake = payload.bet + sum(side_bets.values())
+    # Set aside what the rounds could lose at most, every hand split and doubled,
+    # so that other sessions of the same owner cannot spend it meanwhile.
+    worst_case = payload.rounds * (MAX_PLAYER_HANDS * 2 * payload.bet + sum(side_bets.values()))
+    reserved = await db.run(db.reserve_user_balance, user["id"], stake, worst_case)
+    if reserved is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Bet exceeds available balance.")
+
+    try:
+        # Thousands of rounds would hold the event loop; they only need a worker thread.
+        run = await run_in_threadpool(
+            run_autoplay,
+            payload.rounds,
+            payload.strategy,
+            payload.bet,
+            side_bets,
+            funds=reserved,
+            owner_id=user["id"],
+            report_every=payload.report_every,
+        )
+    except BaseException:
+        await db.run(db.adjust_user_balance, user["id"], reserved)
+        raise
+    # The rounds never stake more than the reservation, so giving it back with the net always succeeds.
+    balance = await db.run(db.adjust_user_balance, user["id"], reserved + run.net)
+
+    lines = [{"type": "progress", **report} for report in run.reports[:-1]]
+    lines.append({"type": "summary", **run.reports[-1], "stopped": run.stopped, "balance": balance})
+    return StreamingResponse(
+        (json.dumps(line, separators=(",", ":")) + "\n" for line in lines),
+        media_type="application/x-ndjson",
+    )
 
-@app.post("/game/split", response_model=GameStateResponse)
-def split(
-    payload: GameHandActionRequest,
-    user: Optional[sqlite3.Row] = Depends(optional_user),
-) -> GameStateResponse:
-    session = session_manager.get_session(payload.session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-    ensure_owner(session, user)
 
-    cost = session.split_cost(payload.hand_index)
-    if cost <= 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Split impossible sur cette main.")
+def session_etag(
+    session: GameSession, balance: Optional[int], accept: Optional[str] = None, since_version: Optional[int] = None
+) -> str:
+    # The balance can change through other sessions of the same owner.
+    representation = ".msgpack" if accepts_msgpack(accept) else ""
+    if since_version is not None and state_delta(session, since_version) is not None:
+        representation += f".since{since_version}"
+    return f'"{session.session_id}.{session.version}.{balance}{representation}"'
 
-    balance: Optional[int] = None
-    if session.owner_id:
-        record = db.get_user_by_id(session.owner_id)
-        if not record or record["balance"] < cost:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solde insuffisant pour séparer.")
-        new_balance = record["balance"] - cost
-        db.update_user_balance(session.owner_id, new_balance)
-        balance = new_balance
 
-    if not session.player_split(payload.hand_index):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Split impossible sur cette main.")
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
 
-    if session.is_over:
-        balance = settle_session(session) or balance
-        if session.owner_id and balance is None:
-            refreshed = db.get_user_by_id(session.owner_id)
-            balance = refreshed["balance"] if refreshed else None
 
-    return serialize_session(session, balance)
+@app.get("/game/{session_id}", response_model=GameStateResponse)
+async def get_state(
+    session_id: str,
+    request: Request,
+    user: Optional[sqlite3.Row] = Depends(optional_user),
+    if_none_match: Optional[str] = Header(default=None),
+    since_version: Optional[int] = Query(default=None, ge=0),
+) -> Response:
+    def render(session: GameSession, balance: Optional[int], extra: Optional[Dict[str, object]]) -> Response:
+        etag = session_etag(session, balance, request.headers.get("accept"), since_version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Vary": "Accept"})
+        return serialize_session(session, balance, request, headers={"ETag": etag}, since_version=since_version)
 
+    return await run_action(user, read_state, session_id, user, render)
 
-@app.get("/game/{session_id}", response_model=GameStateResponse)
-def get_state(
+
+@app.get("/game/{session_id}/events", response_class=StreamingResponse)
+async def session_event_stream(
     session_id: str,
+    request: Request,
     user: Optional[sqlite3.Row] = Depends(optional_user),
-) -> GameStateResponse:
-    session = session_manager.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-    ensure_owner(session, user)
+) -> StreamingResponse:
+    """Server-Sent Events stream of the session's states.
+
+    Sends the current state, then a ``state`` event after every action on the
+    session, with the session version as event id.
+    """
+    # Subscribe first so no action falls between the current state and the stream.
+    subscriber = session_events.subscribe(session_id)
+    try:
+        first = await run_action(user, read_state, session_id, user, lambda session, balance, extra: state_event(session, balance))
+    except BaseException:
+        session_events.unsubscribe(subscriber)
+        raise
+
+    async def stream():
+        try:
+            yield first
+            while not subscriber.closed:
+                frame = await subscriber.next()
+                if await request.is_disconnected():
+                    break
+                if frame is not None:
+                    yield frame
+                elif not subscriber.closed:
+                    yield KEEP_ALIVE
+        finally:
+            session_events.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-    balance = None
-    if session.owner_id:
-        record = db.get_user_by_id(session.owner_id)
-        balance = record["balance"] if record else None
-    return serialize_session(session, balance)
+@app.get("/game/{session_id}/hint", response_model=HintResponse)
+async def get_hint(
+    session_id: str,
+    user: Optional[sqlite3.Row] = Depends(optional_user),
+) -> HintResponse:
+    return await run_action(user, recommend, session_id, user)
+
+
+def recommend(session_id: str, user: Optional[sqlite3.Row]) -> HintResponse:
+    with session_manager.checkout(session_id) as session:
+        session = found_session(session, user)
+        index = session.active_hand_index
+        if session.is_over or index is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Aucune main active.")
+        action = strategy.get_table().recommend(session, index)
+        return HintResponse(session_id=session.session_id, hand_index=index, action=action)
+
+
+# Messages accepted on /ws/game: type -> (payload schema, action).
+_SOCKET_ACTIONS: Dict[str, Tuple[Type[BaseModel], Callable[..., bytes]]] = {
+    "start": (GameStartRequest, play_start),
+    "next": (GameNextRoundRequest, play_next),
+    "hit": (GameActionRequest, partial(play_move, "hit")),
+    "stand": (GameActionRequest, partial(play_move, "stand")),
+    "double": (GameHandActionRequest, partial(play_move, "double")),
+    "split": (GameHandActionRequest, partial(play_move, "split")),
+    "batch": (GameBatchRequest, play_batch),
+    "state": (GameSessionRequest, lambda payload, user, render: read_state(payload.session_id, user, render)),
+}
+
+
+def socket_error(message_id: object, status_code: int, detail: object, **fields: object) -> str:
+    error = {"status": status_code, "detail": jsonable_encoder(detail), **fields}
+    return json.dumps({"id": message_id, "error": error}, ensure_ascii=False)
+
+
+def socket_state(
+    session: GameSession,
+    balance: Optional[int],
+    extra: Optional[Dict[str, object]],
+    since_version: Optional[int] = None,
+) -> bytes:
+    delta = state_delta(session, since_version) if since_version is not None else None
+    if delta is None:
+        return game_state_json(session, balance, extra)
+    return game_state_delta_body(session, balance, delta, since_version, extra=extra)
+
+
+def socket_reply(message: Dict[str, object], user: Optional[sqlite3.Row]) -> str:
+    """Play one ``/ws/game`` message and return the text frame answering it."""
+    message_id = message.get("id")
+    try:
+        entry = _SOCKET_ACTIONS.get(message.get("type"))
+        if entry is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown message type.")
+        schema, action = entry
+        payload = schema.parse_obj(message)
+        owner = session_worker(getattr(payload, "session_id", ""))
+        if WORKER_ID and owner and owner != WORKER_ID:
+            return socket_error(message_id, 421, "Session is served by another worker.", worker_id=owner)
+        body = action(payload, user, partial(socket_state, since_version=getattr(payload, "since_version", None)))
+    except ValidationError as exc:
+        return socket_error(message_id, status.HTTP_422_UNPROCESSABLE_ENTITY, exc.errors())
+    except HTTPException as exc:
+        return socket_error(message_id, exc.status_code, exc.detail)
+    except SessionConflictError:
+        return socket_error(message_id, status.HTTP_409_CONFLICT, SESSION_CONFLICT_DETAIL)
+    return f'{{"id":{json.dumps(message_id)},"state":{body.decode("utf-8")}}}'
+
+
+@app.websocket("/ws/game")
+async def game_socket(websocket: WebSocket) -> None:
+    """Game actions over a single connection, authenticated once.
+
+    Clients send JSON messages with a ``type`` (``start``, ``next``, ``hit``,
+    ``stand``, ``double``, ``split``, ``batch`` or ``state``), the fields of
+    the matching HTTP request and an optional ``id``. Each one is answered
+    with ``{"id": ..., "state": <GameStateResponse>}`` or
+    ``{"id": ..., "error": {"status": ..., "detail": ...}}``. The token comes
+    from the ``Authorization`` header of the handshake or from an ``auth``
+    message with a ``token`` field, since browsers cannot set headers on
+    WebSockets.
+    """
+    try:
+        user = await optional_user(websocket.headers.get("authorization"))
+    except HTTPException as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_text(socket_error(None, status.HTTP_400_BAD_REQUEST, "Messages must be JSON objects."))
+                continue
+            if message.get("type") == "auth":
+                token = message.get("token")
+                record = await db.run(authenticate, token) if isinstance(token, str) else None
+                if record is None:
+                    reply = socket_error(message.get("id"), status.HTTP_401_UNAUTHORIZED, "Invalid or expired token.")
+                else:
+                    user = record
+                    reply = json.dumps({"id": message.get("id"), "user": {"id": user["id"], "username": user["username"]}})
+                await websocket.send_text(reply)
+                continue
+            if message.get("type") == "start":
+                reply = await run_in_action_thread(socket_reply, message, user)
+            else:
+                reply = await run_action(user, socket_reply, message, user)
+            await websocket.send_text(reply)
+    except WebSocketDisconnect:
+        return
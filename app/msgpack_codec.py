@@ -0,0 +1,104 @@
+"""Minimal MessagePack encoder for API responses.
+
+Covers the types found in game state payloads (``None``, booleans, integers,
+floats, strings, bytes, lists, tuples and dicts) and always picks the
+smallest MessagePack representation, as the reference implementation does.
+Kept in-tree so binary responses need no extra dependency.
+"""
+from __future__ import annotations
+
+import struct
+
+MEDIA_TYPE = "application/msgpack"
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xFF)
+    elif value >= 0:
+        if value <= 0xFF:
+            out += struct.pack(">BB", 0xCC, value)
+        elif value <= 0xFFFF:
+            out += struct.pack(">BH", 0xCD, value)
+        elif value <= 0xFFFFFFFF:
+            out += struct.pack(">BI", 0xCE, value)
+        elif value <= 0xFFFFFFFFFFFFFFFF:
+            out += struct.pack(">BQ", 0xCF, value)
+        else:
+            raise OverflowError("Integer too large for MessagePack.")
+    elif value >= -0x80:
+        out += struct.pack(">Bb", 0xD0, value)
+    elif value >= -0x8000:
+        out += struct.pack(">Bh", 0xD1, value)
+    elif value >= -0x80000000:
+        out += struct.pack(">Bi", 0xD2, value)
+    elif value >= -0x8000000000000000:
+        out += struct.pack(">Bq", 0xD3, value)
+    else:
+        raise OverflowError("Integer too large for MessagePack.")
+
+
+def _pack_length(length: int, out: bytearray, fix: int, fix_limit: int, codes: tuple) -> None:
+    """Write a container or string header; ``codes`` are the 8, 16 and 32-bit forms."""
+    if length < fix_limit:
+        out.append(fix | length)
+    elif codes[0] is not None and length <= 0xFF:
+        out += struct.pack(">BB", codes[0], length)
+    elif length <= 0xFFFF:
+        out += struct.pack(">BH", codes[1], length)
+    else:
+        out += struct.pack(">BI", codes[2], length)
+
+
+def _pack(value: object, out: bytearray) -> None:
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_length(len(data), out, 0xA0, 32, (0xD9, 0xDA, 0xDB))
+        out += data
+    elif isinstance(value, dict):
+        _pack_length(len(value), out, 0x80, 16, (None, 0xDE, 0xDF))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    elif isinstance(value, (list, tuple)):
+        _pack_length(len(value), out, 0x90, 16, (None, 0xDC, 0xDD))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, float):
+        out += struct.pack(">Bd", 0xCB, value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        if len(data) <= 0xFF:
+            out += struct.pack(">BB", 0xC4, len(data))
+        elif len(data) <= 0xFFFF:
+            out += struct.pack(">BH", 0xC5, len(data))
+        else:
+            out += struct.pack(">BI", 0xC6, len(data))
+        out += data
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack.")
+
+
+def packb(value: object) -> bytes:
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def pack_map_header(length: int) -> bytes:
+    out = bytearray()
+    _pack_length(length, out, 0x80, 16, (None, 0xDE, 0xDF))
+    return bytes(out)
+
+
+__all__ = ["MEDIA_TYPE", "pack_map_header", "packb"]
@@ -0,0 +1,253 @@
+"""Game state responses encoded straight from ``GameSession``.
+
+Endpoints keep ``response_model=GameStateResponse`` for the OpenAPI schema
+but return these responses, which FastAPI sends as is: the body is built with
+the C-accelerated ``json`` encoder from the session's cached ``serialize``
+output, without constructing, validating and re-encoding the pydantic model.
+Everything but the balance is encoded once per session version.
+
+Clients sending ``Accept: application/msgpack`` get the same fields as a
+MessagePack map instead, with every card as its integer code
+(``suit index * 13 + rank index`` over ``SUITS`` and ``RANKS``). JSON stays
+the default.
+
+Clients sending the ``version`` of the last state they hold as
+``since_version`` get a delta against it instead, as long as the session
+still remembers that version (see ``GameSession.serialized_at``): the new
+``version``, the ``balance`` and only what changed. Hands list their
+``new_cards``, or their full ``cards`` when they were replaced, such as after
+a split or in a new round. Otherwise the full state is sent.
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, Mapping, Optional, Tuple
+
+from starlette.responses import Response
+
+from . import msgpack_codec
+from .blackjack import GameSession, card_code
+
+# Same settings as FastAPI's JSONResponse, so bodies are byte-for-byte identical.
+_encode = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode
+
+# Fields of GameStateResponse, in order, around ``balance``.
+_HEAD_FIELDS = ("session_id", "player_hands", "dealer_hand", "is_over", "outcome", "bet")
+
+
+# Fields of GameStateResponse after ``balance``.
+_TAIL_FIELDS = ("active_hand_index", "side_bets", "version")
+_STATE_FIELD_COUNT = len(_HEAD_FIELDS) + 1 + len(_TAIL_FIELDS)
+
+# Scalar fields a delta carries when they changed.
+_DELTA_FIELDS = ("is_over", "outcome", "bet", "active_hand_index")
+
+
+def _state_json_parts(session: GameSession) -> Tuple[bytes, bytes]:
+    data = session.serialize()
+    head = _encode({field: data[field] for field in _HEAD_FIELDS})[:-1] + ',"balance":'
+    tail = "".join(f',"{field}":{_encode(data[field])}' for field in _TAIL_FIELDS) + "}"
+    return head.encode("utf-8"), tail.encode("utf-8")
+
+
+def _state_msgpack_parts(session: GameSession) -> Tuple[bytes, bytes]:
+    data = session.serialize()
+    compact = {field: data[field] for field in _HEAD_FIELDS}
+    compact["player_hands"] = [
+        {**hand, "cards": list(state.hand.cards)} for hand, state in zip(data["player_hands"], session.player_hands)
+    ]
+    compact["dealer_hand"] = {**data["dealer_hand"], "cards": list(session.dealer_hand.cards)}
+    head = bytearray(msgpack_codec.pack_map_header(_STATE_FIELD_COUNT))
+    for field, value in compact.items():
+        head += msgpack_codec.packb(field) + msgpack_codec.packb(value)
+    head += msgpack_codec.packb("balance")
+    tail = b"".join(msgpack_codec.packb(field) + msgpack_codec.packb(data[field]) for field in _TAIL_FIELDS)
+    return bytes(head), tail
+
+
+def _hand_delta(old: Optional[Dict[str, object]], new: Dict[str, object]) -> Dict[str, object]:
+    """Changed fields of a serialized hand; empty when nothing changed."""
+    old_cards = old["cards"] if old is not None else None
+    if old_cards is None or new["cards"][: len(old_cards)] != old_cards:
+        return dict(new)
+    delta = {key: value for key, value in new.items() if key != "cards" and old.get(key) != value}
+    if len(new["cards"]) > len(old_cards):
+        delta["new_cards"] = new["cards"][len(old_cards) :]
+    return delta
+
+
+def _state_delta(old: Dict[str, object], new: Dict[str, object]) -> Dict[str, object]:
+    delta: Dict[str, object] = {field: new[field] for field in _DELTA_FIELDS if old[field] != new[field]}
+    dealer = _hand_delta(old["dealer_hand"], new["dealer_hand"])
+    if dealer:
+        delta["dealer_hand"] = dealer
+    old_hands, new_hands = old["player_hands"], new["player_hands"]
+    changed = []
+    for index, hand in enumerate(new_hands):
+        hand_delta = _hand_delta(old_hands[index] if index < len(old_hands) else None, hand)
+        if hand_delta:
+            changed.append({"index": index, **hand_delta})
+    if changed or len(old_hands) != len(new_hands):
+        delta["player_hands"] = {"count": len(new_hands), "changed": changed}
+    # Side bets that are gone are sent as null.
+    side_bets = {key: value for key, value in new["side_bets"].items() if old["side_bets"].get(key) != value}
+    side_bets.update({key: None for key in old["side_bets"] if key not in new["side_bets"]})
+    if side_bets:
+        delta["side_bets"] = side_bets
+    return delta
+
+
+def _with_card_codes(delta: Dict[str, object]) -> Dict[str, object]:
+    """Copy of ``delta`` with cards as integer codes, as in MessagePack states."""
+
+    def codes(hand: Dict[str, object]) -> Dict[str, object]:
+        converted = dict(hand)
+        for key in ("cards", "new_cards"):
+            if key in converted:
+                converted[key] = [card_code(card["suit"], card["rank"]) for card in converted[key]]
+        return converted
+
+    delta = dict(delta)
+    if "dealer_hand" in delta:
+        delta["dealer_hand"] = codes(delta["dealer_hand"])
+    if "player_hands" in delta:
+        hands = delta["player_hands"]
+        delta["player_hands"] = {"count": hands["count"], "changed": [codes(hand) for hand in hands["changed"]]}
+    return delta
+
+
+def state_delta(session: GameSession, since_version: int) -> Optional[Dict[str, object]]:
+    """Changes since ``since_version``, or ``None`` if that version is no longer known."""
+    if since_version == session.version:
+        return {}
+    old = session.serialized_at(since_version)
+    if old is None or since_version > session.version:
+        return None
+    return session.cached(f"delta:{since_version}", lambda current: _state_delta(old, current.serialize()))
+
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    """Whether the ``Accept`` header asks for MessagePack."""
+    if not accept:
+        return False
+    for entry in accept.split(","):
+        media_type, _, parameters = entry.partition(";")
+        if media_type.strip().lower() in (msgpack_codec.MEDIA_TYPE, "application/x-msgpack"):
+            return parameters.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def game_state_body(session: GameSession, balance: Optional[int]) -> bytes:
+    """JSON body of ``GameStateResponse`` for the session and balance."""
+    head, tail = session.cached("state_json", _state_json_parts)
+    return b"".join((head, b"null" if balance is None else str(int(balance)).encode("ascii"), tail))
+
+
+def game_state_json(
+    session: GameSession, balance: Optional[int], extra: Optional[Mapping[str, object]] = None
+) -> bytes:
+    """``game_state_body`` followed by any ``extra`` fields."""
+    body = game_state_body(session, balance)
+    if extra:
+        body = body[:-1] + b"," + _encode(dict(extra))[1:].encode("utf-8")
+    return body
+
+
+def game_state_msgpack(session: GameSession, balance: Optional[int]) -> bytes:
+    """MessagePack body of ``GameStateResponse``, cards as integer codes."""
+    head, tail = session.cached("state_msgpack", _state_msgpack_parts)
+    return b"".join((head, msgpack_codec.packb(balance), tail))
+
+
+class GameStateJSONResponse(Response):
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        session: GameSession,
+        balance: Optional[int],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        extra: Optional[Mapping[str, object]] = None,
+    ) -> None:
+        super().__init__(game_state_json(session, balance, extra), status_code=status_code, headers=headers)
+
+
+class GameStateMsgpackResponse(Response):
+    media_type = msgpack_codec.MEDIA_TYPE
+
+    def __init__(
+        self,
+        session: GameSession,
+        balance: Optional[int],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        extra: Optional[Mapping[str, object]] = None,
+    ) -> None:
+        body = game_state_msgpack(session, balance)
+        if extra:
+            # The state map has a one-byte fixmap header; rewrite it with the extra fields counted.
+            header = msgpack_codec.pack_map_header(_STATE_FIELD_COUNT + len(extra))
+            pairs = b"".join(msgpack_codec.packb(key) + msgpack_codec.packb(value) for key, value in extra.items())
+            body = header + body[1:] + pairs
+        super().__init__(body, status_code=status_code, headers=headers)
+
+
+def game_state_delta_body(
+    session: GameSession,
+    balance: Optional[int],
+    delta: Mapping[str, object],
+    since_version: int,
+    msgpack: bool = False,
+    extra: Optional[Mapping[str, object]] = None,
+) -> bytes:
+    """Body of a delta response in JSON, or in MessagePack with cards as codes."""
+    changes = _with_card_codes(delta) if msgpack else delta
+    body = {
+        "session_id": session.session_id,
+        "version": session.version,
+        "since_version": since_version,
+        **changes,
+        "balance": balance,
+        **(extra or {}),
+    }
+    return msgpack_codec.packb(body) if msgpack else _encode(body).encode("utf-8")
+
+
+def game_state_response(
+    session: GameSession,
+    balance: Optional[int],
+    accept: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    extra: Optional[Mapping[str, object]] = None,
+    since_version: Optional[int] = None,
+) -> Response:
+    """Game state in the format negotiated from ``accept``, followed by any ``extra`` fields.
+
+    With ``since_version``, only the changes since that version are sent when
+    they can be computed.
+    """
+    msgpack = accepts_msgpack(accept)
+    delta = state_delta(session, since_version) if since_version is not None else None
+    if delta is not None:
+        body = game_state_delta_body(session, balance, delta, since_version, msgpack, extra)
+        media_type = msgpack_codec.MEDIA_TYPE if msgpack else "application/json"
+        response = Response(body, headers=headers, media_type=media_type)
+    else:
+        response_class = GameStateMsgpackResponse if msgpack else GameStateJSONResponse
+        response = response_class(session, balance, headers=headers, extra=extra)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+__all__ = [
+    "GameStateJSONResponse",
+    "GameStateMsgpackResponse",
+    "accepts_msgpack",
+    "game_state_body",
+    "game_state_delta_body",
+    "game_state_json",
+    "game_state_msgpack",
+    "game_state_response",
+    "state_delta",
+]
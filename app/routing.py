@@ -0,0 +1,77 @@
+"""Worker-affine routing of session requests.
+
+With ``BLACKJACK_WORKER_ID`` set, every session id created by the process is
+``<worker id>-<hex>``. Running one single-worker instance per core behind a
+proxy that routes on that prefix (see the README) sends every request for a
+session to the process that keeps it in local memory. Clients name the
+session of a request in the ``X-Session-Id`` header, or in the path for
+``/game/{session_id}`` routes, so the proxy never has to read request bodies.
+
+``WorkerAffinityMiddleware`` answers requests that reach the wrong instance
+anyway with ``421 Misdirected Request`` and the owning worker in
+``X-Worker-Id``, instead of a misleading 404.
+"""
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .blackjack import SESSION_ID_SEPARATOR, WORKER_ID
+
+SESSION_HEADER = b"x-session-id"
+WORKER_HEADER = "X-Worker-Id"
+_GAME_PATH = re.compile(rf"^/game/([A-Za-z0-9]+){SESSION_ID_SEPARATOR}")
+
+
+def session_worker(session_id: str) -> Optional[str]:
+    """Worker id embedded in ``session_id``, if any."""
+    worker, separator, _ = session_id.partition(SESSION_ID_SEPARATOR)
+    return worker if separator and worker.isalnum() else None
+
+
+def request_worker(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == SESSION_HEADER:
+            return session_worker(value.decode("latin-1"))
+    match = _GAME_PATH.match(scope.get("path", ""))
+    return match.group(1) if match else None
+
+
+class WorkerAffinityMiddleware:
+    """Reject requests for sessions owned by another worker and tag responses."""
+
+    def __init__(self, app: ASGIApp, worker_id: str = WORKER_ID) -> None:
+        self.app = app
+        self.worker_id = worker_id
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.worker_id:
+            await self.app(scope, receive, send)
+            return
+        owner = request_worker(scope)
+        if owner is not None and owner != self.worker_id:
+            response = JSONResponse(
+                {"detail": "Session is served by another worker."},
+                status_code=421,
+                headers={WORKER_HEADER: owner},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_worker(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[WORKER_HEADER] = self.worker_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_worker)
+
+
+__all__ = [
+    "WorkerAffinityMiddleware",
+    "request_worker",
+    "session_worker",
+]
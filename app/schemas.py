@@ -1,10 +1,12 @@
 """Pydantic schemas for request and response payloads."""
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, validator
 
+MAX_AUTOPLAY_ROUNDS = 10_000
+
 
 class SignupRequest(BaseModel):
     username: str = Field(..., min_length=3, max_length=30)
@@ -27,8 +29,17 @@ class GameStartRequest(BaseModel):
     side_bets: Dict[str, int] = Field(default_factory=dict)
 
 
-class GameActionRequest(BaseModel):
+class GameNextRoundRequest(GameStartRequest):
+    session_id: str
+    since_version: Optional[int] = Field(default=None, ge=0)
+
+
+class GameSessionRequest(BaseModel):
     session_id: str
+    since_version: Optional[int] = Field(default=None, ge=0)
+
+
+class GameActionRequest(GameSessionRequest):
     hand_index: Optional[int] = Field(default=None, ge=0)
 
 
@@ -36,6 +47,23 @@ class GameHandActionRequest(GameActionRequest):
     hand_index: int = Field(..., ge=0)
 
 
+class GameBatchAction(BaseModel):
+    action: Literal["hit", "stand", "double", "split"]
+    hand_index: Optional[int] = Field(default=None, ge=0)
+
+
+class GameBatchRequest(GameSessionRequest):
+    actions: List[GameBatchAction] = Field(..., min_items=1, max_items=32)
+
+
+class AutoplayRequest(BaseModel):
+    rounds: int = Field(..., ge=1, le=MAX_AUTOPLAY_ROUNDS)
+    strategy: Literal["basic", "stand", "dealer"] = "basic"
+    bet: int = Field(default=0, ge=0)
+    side_bets: Dict[str, int] = Field(default_factory=dict)
+    report_every: Optional[int] = Field(default=None, ge=1)
+
+
 class TokenResponse(BaseModel):
     token: str
 
@@ -50,3 +78,22 @@ class GameStateResponse(BaseModel):
     balance: Optional[int]
     active_hand_index: Optional[int]
     side_bets: Dict[str, dict]
+    version: int
+
+
+class HintResponse(BaseModel):
+    session_id: str
+    hand_index: int
+    action: str
+
+
+class GameBatchStep(BaseModel):
+    action: str
+    hand_index: int
+    cost: int
+    value: int
+    result: Optional[str]
+
+
+class GameBatchResponse(GameStateResponse):
+    steps: List[GameBatchStep]
@@ -0,0 +1,282 @@
+"""Fixed-size binary records holding the complete state of a ``GameSession``.
+
+Every session packs into exactly ``RECORD_SIZE`` bytes, so records can live
+side by side in a flat buffer (a shared memory slab, a snapshot file) and be
+read or written in place with ``struct`` without any intermediate JSON.
+
+Layout, all little-endian:
+
+* header: slot state, token, last access (wall clock), owner id, state
+  version, flags, active hand index, outcome, hand count, dealer card count and cards;
+* ``MAX_PLAYER_HANDS`` hand records: bet, flags, outcome, card count, cards;
+* one record per known side bet: bet, payout, result;
+* unknown side bets as a short JSON object of their amounts;
+* the shoe: kind, penetration, size, cursor, seed, then either the eager card
+  bytes or the lazy deck's displaced positions as ``(index, card code)`` pairs.
+"""
+from __future__ import annotations
+
+import json
+import struct
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+from .blackjack import (
+    CARDS_PER_DECK,
+    MAX_PLAYER_HANDS,
+    NUMBER_OF_DECKS,
+    SIDE_BET_DEFINITIONS,
+    Deck,
+    GameSession,
+    Hand,
+    LazyDeck,
+    PlayerHandState,
+    Shoe,
+    cut_card_position,
+)
+
+MAX_HAND_CARDS = 22
+MAX_SHOE_CARDS = CARDS_PER_DECK * NUMBER_OF_DECKS
+EXTRA_SIDE_BETS_BYTES = 128
+
+SLOT_FREE = 0
+SLOT_USED = 1
+
+OUTCOMES: Tuple[Optional[str], ...] = (
+    None,
+    "player_blackjack",
+    "dealer_blackjack",
+    "push",
+    "player_win",
+    "dealer_bust",
+    "dealer_win",
+    "player_bust",
+    "mixed",
+)
+SIDE_BET_RESULTS = ("inactive", "pending", "win", "loss")
+SIDE_BET_KEYS = tuple(sorted(SIDE_BET_DEFINITIONS))
+DECK_KINDS = (Deck, LazyDeck)
+
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+_RESULT_CODES = {result: code for code, result in enumerate(SIDE_BET_RESULTS)}
+
+_IS_OVER = 1
+_IS_SETTLED = 2
+_IS_DOUBLED = 1
+_HAS_STOOD = 2
+
+_HEADER = struct.Struct(f"<BQdqIBbBBB{MAX_HAND_CARDS}s")
+_HAND = struct.Struct(f"<qBBB{MAX_HAND_CARDS}s")
+_SIDE_BET = struct.Struct("<qqB")
+_EXTRA = struct.Struct(f"<H{EXTRA_SIDE_BETS_BYTES}s")
+_DECK = struct.Struct("<BdHHQH")
+_SWAP = struct.Struct("<HH")
+
+# Slot state, token, last access and owner lead the header so they can be read alone.
+_SLOT = struct.Struct("<BQdq")
+_LAST_ACCESS_OFFSET = struct.calcsize("<BQ")
+
+_HANDS_OFFSET = _HEADER.size
+_SIDE_BETS_OFFSET = _HANDS_OFFSET + MAX_PLAYER_HANDS * _HAND.size
+_EXTRA_OFFSET = _SIDE_BETS_OFFSET + len(SIDE_BET_KEYS) * _SIDE_BET.size
+_DECK_OFFSET = _EXTRA_OFFSET + _EXTRA.size
+_DECK_DATA_OFFSET = _DECK_OFFSET + _DECK.size
+# A lazy deck displaces at most one position per card dealt.
+_DECK_DATA_SIZE = max(MAX_SHOE_CARDS, MAX_SHOE_CARDS * _SWAP.size)
+RECORD_SIZE = _DECK_DATA_OFFSET + _DECK_DATA_SIZE
+
+
+def read_slot(buffer, offset: int) -> Tuple[int, int, float, int]:
+    """Return the slot state, token, last access and owner id of the record at ``offset``."""
+    return _SLOT.unpack_from(buffer, offset)
+
+
+def touch(buffer, offset: int, last_access: float) -> None:
+    struct.pack_into("<d", buffer, offset + _LAST_ACCESS_OFFSET, last_access)
+
+
+def free_slot(buffer, offset: int) -> None:
+    buffer[offset] = SLOT_FREE
+
+
+def packed_size(buffer, offset: int) -> int:
+    """Bytes of the record at ``offset`` in use; the rest of the shoe area is slack."""
+    kind, _, size, _, _, entries = _DECK.unpack_from(buffer, offset + _DECK_OFFSET)
+    return _DECK_DATA_OFFSET + (entries * _SWAP.size if kind else size)
+
+
+def _cards(cards) -> bytes:
+    if len(cards) > MAX_HAND_CARDS:
+        raise ValueError("Too many cards in a hand for a session record.")
+    return bytes(cards)
+
+
+def pack_session(
+    session: GameSession,
+    buffer,
+    offset: int,
+    token: int,
+    last_access: Optional[float] = None,
+) -> None:
+    """Write ``session`` as the record at ``offset``, marking the slot used.
+
+    The slot state byte is written last, so a record is never marked used
+    before the rest of it is in place.
+    """
+    if len(session.player_hands) > MAX_PLAYER_HANDS:
+        raise ValueError("Too many player hands for a session record.")
+    extra = {key: amount for key, amount in session.side_bets.items() if key not in SIDE_BET_DEFINITIONS}
+    extra_bytes = json.dumps(extra, separators=(",", ":")).encode("utf-8") if extra else b""
+    if len(extra_bytes) > EXTRA_SIDE_BETS_BYTES:
+        raise ValueError("Too many unknown side bets for a session record.")
+    try:
+        _HEADER.pack_into(
+            buffer,
+            offset,
+            SLOT_FREE,
+            token,
+            time.time() if last_access is None else last_access,
+            session.owner_id or 0,
+            session.version & 0xFFFFFFFF,
+            (_IS_OVER if session.is_over else 0) | (_IS_SETTLED if session.is_settled else 0),
+            -1 if session.active_hand_index is None else session.active_hand_index,
+            _OUTCOME_CODES[session.outcome],
+            len(session.player_hands),
+            len(session.dealer_hand.cards),
+            _cards(session.dealer_hand.cards),
+        )
+        for index, state in enumerate(session.player_hands):
+            _HAND.pack_into(
+                buffer,
+                offset + _HANDS_OFFSET + index * _HAND.size,
+                state.bet,
+                (_IS_DOUBLED if state.is_doubled else 0) | (_HAS_STOOD if state.has_stood else 0),
+                _OUTCOME_CODES[state.outcome],
+                len(state.hand.cards),
+                _cards(state.hand.cards),
+            )
+        for index, key in enumerate(SIDE_BET_KEYS):
+            result = session.side_bet_results.get(key)
+            _SIDE_BET.pack_into(
+                buffer,
+                offset + _SIDE_BETS_OFFSET + index * _SIDE_BET.size,
+                session.side_bets.get(key, 0),
+                int(result["payout"]) if result else 0,
+                _RESULT_CODES[result["result"]] if result else 0,
+            )
+        _EXTRA.pack_into(buffer, offset + _EXTRA_OFFSET, len(extra_bytes), extra_bytes)
+        _pack_deck(session.deck, buffer, offset + _DECK_OFFSET)
+    except struct.error as exc:
+        raise ValueError(f"Session does not fit in a record: {exc}") from None
+    buffer[offset] = SLOT_USED
+
+
+def _pack_deck(deck: Shoe, buffer, offset: int) -> None:
+    data = offset + _DECK.size
+    if deck.remaining + deck.position > MAX_SHOE_CARDS:
+        raise ValueError("Shoe too large for a session record.")
+    if isinstance(deck, LazyDeck):
+        swaps = deck.swaps
+        _DECK.pack_into(buffer, offset, 1, deck.penetration, deck.size, deck.position, deck.seed, len(swaps))
+        for index, (position, value) in enumerate(swaps):
+            _SWAP.pack_into(buffer, data + index * _SWAP.size, position, value)
+        return
+    size = len(deck.cards)
+    _DECK.pack_into(buffer, offset, 0, deck.penetration, size, deck.position, 0, size)
+    buffer[data : data + size] = deck.cards.tobytes()
+
+
+def _unpack_deck(buffer, offset: int) -> Shoe:
+    kind, penetration, size, position, seed, entries = _DECK.unpack_from(buffer, offset)
+    data = offset + _DECK.size
+    deck = DECK_KINDS[kind].__new__(DECK_KINDS[kind])
+    deck.penetration = penetration
+    deck.cut_card = cut_card_position(size, penetration)
+    deck.position = position
+    if kind:
+        deck.size = size
+        deck.seed = seed
+        deck.set_swaps(_SWAP.iter_unpack(bytes(buffer[data : data + entries * _SWAP.size])))
+    else:
+        deck.cards = array("B", bytes(buffer[data : data + size]))
+    return deck
+
+
+def unpack_session(buffer, offset: int, session_id: str) -> GameSession:
+    """Rebuild the session stored in the record at ``offset``."""
+    (
+        _state,
+        _token,
+        _last_access,
+        owner_id,
+        version,
+        flags,
+        active_hand_index,
+        outcome,
+        hand_count,
+        dealer_count,
+        dealer_cards,
+    ) = _HEADER.unpack_from(buffer, offset)
+    session = GameSession._blank(session_id, owner_id or None, _unpack_deck(buffer, offset + _DECK_OFFSET), version)
+    session.dealer_hand = Hand(cards=list(dealer_cards[:dealer_count]))
+    for index in range(hand_count):
+        bet, hand_flags, hand_outcome, count, cards = _HAND.unpack_from(
+            buffer, offset + _HANDS_OFFSET + index * _HAND.size
+        )
+        session.player_hands.append(
+            PlayerHandState(
+                hand=Hand(cards=list(cards[:count])),
+                bet=bet,
+                is_doubled=bool(hand_flags & _IS_DOUBLED),
+                has_stood=bool(hand_flags & _HAS_STOOD),
+                outcome=OUTCOMES[hand_outcome],
+            )
+        )
+    session.active_hand_index = None if active_hand_index < 0 else active_hand_index
+    session.is_over = bool(flags & _IS_OVER)
+    session.outcome = OUTCOMES[outcome]
+    session.is_settled = bool(flags & _IS_SETTLED)
+
+    for index, key in enumerate(SIDE_BET_KEYS):
+        bet, payout, result = _SIDE_BET.unpack_from(buffer, offset + _SIDE_BETS_OFFSET + index * _SIDE_BET.size)
+        if bet:
+            session.side_bets[key] = bet
+        session.side_bet_results[key] = _side_bet_result(key, bet, payout, SIDE_BET_RESULTS[result])
+    length, extra_bytes = _EXTRA.unpack_from(buffer, offset + _EXTRA_OFFSET)
+    if length:
+        for key, amount in json.loads(extra_bytes[:length]).items():
+            session.side_bets[key] = amount
+            session.side_bet_results[key] = _side_bet_result(key, amount, 0, "loss" if amount > 0 else "inactive")
+    session.side_bet_results = dict(sorted(session.side_bet_results.items()))
+    return session
+
+
+def _side_bet_result(key: str, bet: int, payout: int, result: str) -> Dict[str, object]:
+    definition = SIDE_BET_DEFINITIONS.get(key)
+    if definition is None:
+        description = "Mise perdue." if result == "loss" else ""
+    elif result == "win":
+        description = str(definition["win_message"])
+    else:
+        description = str(definition["lose_message"])
+    return {
+        "bet": bet,
+        "payout": payout,
+        "result": result,
+        "description": description,
+        "label": definition["label"] if definition else key,
+    }
+
+
+__all__ = [
+    "RECORD_SIZE",
+    "SLOT_FREE",
+    "SLOT_USED",
+    "free_slot",
+    "pack_session",
+    "packed_size",
+    "read_slot",
+    "touch",
+    "unpack_session",
+]
@@ -0,0 +1,542 @@
+"""Session storage backends.
+
+The default backend is the in-process ``SessionManager`` from
+``app.blackjack``. When the API runs several uvicorn workers, sessions must be
+visible to every process, so ``SQLiteSessionStore`` keeps each session's
+complete state in a shared SQLite file and claims, loads, mutates and saves
+its row for every action. ``SharedMemorySessionStore`` keeps
+fixed-size binary records in a ``multiprocessing.shared_memory`` slab instead,
+so workers on one host read and write sessions in place.
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import random
+import sqlite3
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+from .blackjack import (
+    DECK_FACTORIES,
+    DECK_MODE,
+    MAX_GUEST_SESSIONS,
+    MAX_OWNED_SESSIONS,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+    Deck,
+    GameSession,
+    SessionManager,
+    Shoe,
+    ShoePool,
+    session_manager as memory_session_manager,
+    shoe_pool,
+)
+from . import session_records
+
+SESSION_BACKEND = os.environ.get("BLACKJACK_SESSION_BACKEND", "memory")
+SESSION_DB_PATH = Path(os.environ.get("BLACKJACK_SESSION_DB", "data/sessions.db"))
+SESSION_SHM_NAME = os.environ.get("BLACKJACK_SESSION_SHM", "openblackjack-sessions")
+SESSION_SHM_SLOTS = int(os.environ.get("BLACKJACK_SESSION_SLOTS", "20000"))
+SESSION_LOCK_PATH = Path(os.environ.get("BLACKJACK_SESSION_LOCK", "data/sessions.lock"))
+# How long a checkout of the SQLite store may hold a session before another
+# worker can take it over, and the longest pause between two claim attempts.
+SESSION_CLAIM_SECONDS = 30.0
+SESSION_CLAIM_MAX_POLL = 0.05
+
+
+class SessionConflictError(RuntimeError):
+    """The session was taken over by another checkout before it could be saved."""
+
+
+class SQLiteSessionStore:
+    """Session store shared by every worker process through one SQLite file.
+
+    ``checkout`` claims the session row with a compare-and-swap on its claim
+    columns, so actions on one session run one at a time across workers while
+    actions on different sessions run concurrently: no transaction is open
+    during the action, which may read and write the users database. A claim
+    expires after ``claim_seconds`` so a crashed worker cannot hold a session
+    forever. ``get_session`` returns a detached copy: changes to it are only
+    persisted through ``checkout``.
+    """
+
+    def __init__(
+        self,
+        path: Path = SESSION_DB_PATH,
+        deck_factory: Callable[[], Shoe] = Deck,
+        shoe_pool: Optional[ShoePool] = None,
+        idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+        max_guest_sessions: int = MAX_GUEST_SESSIONS,
+        max_owned_sessions: int = MAX_OWNED_SESSIONS,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL_SECONDS,
+        claim_seconds: float = SESSION_CLAIM_SECONDS,
+    ) -> None:
+        self.path = path
+        self._deck_factory = deck_factory
+        self.shoe_pool = shoe_pool
+        self.idle_ttl = idle_ttl
+        self.max_guest_sessions = max_guest_sessions
+        self.max_owned_sessions = max_owned_sessions
+        self.sweep_interval = sweep_interval
+        self.claim_seconds = claim_seconds
+        self._last_sweep = 0.0
+        self._local = threading.local()
+        self.evictions: Dict[str, int] = {"expired": 0, "guest_lru": 0, "owned_lru": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite handles locking between them.
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    is_owned INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    state TEXT NOT NULL,
+                    claim TEXT,
+                    claimed_until REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "claim" not in columns:
+                # Files created before checkouts claimed their rows.
+                conn.execute("ALTER TABLE sessions ADD COLUMN claim TEXT")
+                conn.execute("ALTER TABLE sessions ADD COLUMN claimed_until REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (is_owned, last_access)")
+            self._local.connection = conn
+        return conn
+
+    @staticmethod
+    def _dump(session: GameSession) -> str:
+        return json.dumps(session.to_state(), separators=(",", ":"))
+
+    def create_session(
+        self,
+        bet: int = 0,
+        owner_id: Optional[int] = None,
+        side_bets: Optional[Dict[str, int]] = None,
+        deck: Optional[Shoe] = None,
+    ) -> GameSession:
+        if deck is None:
+            deck = self.shoe_pool.acquire() if self.shoe_pool else self._deck_factory()
+        session = GameSession(bet=bet, owner_id=owner_id, side_bets=side_bets, deck=deck)
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO sessions (session_id, is_owned, last_access, state) VALUES (?, ?, ?, ?)",
+                (session.session_id, int(bool(owner_id)), now, self._dump(session)),
+            )
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return session
+
+    def _load(self, conn: sqlite3.Connection, session_id: str, now: float) -> Optional[GameSession]:
+        row = conn.execute(
+            "SELECT state FROM sessions WHERE session_id = ? AND last_access >= ?",
+            (session_id, now - self.idle_ttl),
+        ).fetchone()
+        if row is None:
+            return None
+        return GameSession.from_state(json.loads(row[0]))
+
+    def get_session(self, session_id: str) -> Optional[GameSession]:
+        return self._load(self._connection(), session_id, time.time())
+
+    def _claim(self, conn: sqlite3.Connection, session_id: str, claim: str) -> bool:
+        """Claim the session row, waiting for any other checkout; False if there is no such session."""
+        poll = 0.001
+        while True:
+            now = time.time()
+            claimed = conn.execute(
+                """
+                UPDATE sessions SET claim = ?, claimed_until = ?
+                WHERE session_id = ? AND last_access >= ? AND claimed_until < ?
+                """,
+                (claim, now + self.claim_seconds, session_id, now - self.idle_ttl, now),
+            ).rowcount
+            if claimed:
+                return True
+            exists = conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND last_access >= ?",
+                (session_id, now - self.idle_ttl),
+            ).fetchone()
+            if exists is None:
+                return False
+            time.sleep(poll)
+            poll = min(poll * 2, SESSION_CLAIM_MAX_POLL)
+
+    @contextmanager
+    def checkout(self, session_id: str) -> Iterator[Optional[GameSession]]:
+        """Claim and load the session, then save it back and release it on exit.
+
+        The session is saved even when the action raises, matching the
+        in-memory store where mutations made before an error are kept. Raises
+        ``SessionConflictError`` if the claim expired and another checkout
+        took the session in the meantime; the changes are then discarded.
+        """
+        conn = self._connection()
+        claim = os.urandom(16).hex()
+        if not self._claim(conn, session_id, claim):
+            yield None
+            return
+        session = self._load(conn, session_id, time.time())
+        try:
+            yield session
+        finally:
+            if session is None:
+                saved = conn.execute(
+                    "UPDATE sessions SET claim = NULL, claimed_until = 0 WHERE session_id = ? AND claim = ?",
+                    (session_id, claim),
+                ).rowcount
+            else:
+                saved = conn.execute(
+                    """
+                    UPDATE sessions SET state = ?, last_access = ?, claim = NULL, claimed_until = 0
+                    WHERE session_id = ? AND claim = ?
+                    """,
+                    (self._dump(session), time.time(), session_id, claim),
+                ).rowcount
+            if not saved and session is not None:
+                raise SessionConflictError(f"Session {session_id} was taken over by another checkout.")
+
+    def remove_session(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = self._sweep(conn, time.time())
+        finally:
+            conn.execute("COMMIT")
+        return removed
+
+    def _sweep(self, conn: sqlite3.Connection, now: float) -> int:
+        expired = conn.execute("DELETE FROM sessions WHERE last_access < ?", (now - self.idle_ttl,)).rowcount
+        self.evictions["expired"] += expired
+        for is_owned, limit, reason in ((0, self.max_guest_sessions, "guest_lru"), (1, self.max_owned_sessions, "owned_lru")):
+            evicted = conn.execute(
+                """
+                DELETE FROM sessions WHERE session_id IN (
+                    SELECT session_id FROM sessions WHERE is_owned = ?
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (is_owned, limit),
+            ).rowcount
+            self.evictions[reason] += evicted
+        self._last_sweep = now
+        return expired
+
+    def stats(self) -> Dict[str, object]:
+        counts = dict(
+            self._connection().execute("SELECT is_owned, COUNT(*) FROM sessions GROUP BY is_owned").fetchall()
+        )
+        return {
+            "guest_sessions": counts.get(0, 0),
+            "owned_sessions": counts.get(1, 0),
+            "evictions": dict(self.evictions),
+        }
+
+
+_SLAB_MAGIC = b"OBJSLAB1"
+_SLAB_HEADER = struct.Struct("<8sII")
+_SLAB_DATA_OFFSET = 64
+_THREAD_LOCK_STRIPES = 64
+
+
+@contextmanager
+def _file_lock(fd: int, index: int) -> Iterator[None]:
+    fcntl.lockf(fd, fcntl.LOCK_EX, 1, index)
+    try:
+        yield
+    finally:
+        fcntl.lockf(fd, fcntl.LOCK_UN, 1, index)
+
+
+class SharedMemorySessionStore:
+    """Session store shared by the workers of one host through a shared memory slab.
+
+    Each session is one fixed-size record (see ``app.session_records``) in a
+    slab of ``slots`` records. The session id holds the slot index followed
+    by a random token, so a lookup goes straight to its record and a reused
+    slot never answers for an older id. Records are guarded by ``fcntl``
+    locks on one byte per slot of a lock file, paired with thread locks as
+    ``fcntl`` locks are held per process. When every slot is taken, the least
+    recently used guest session (else owned session) is evicted.
+
+    ``get_session`` returns a detached copy: changes to it are only persisted
+    through ``checkout``, which writes the record back in place.
+    """
+
+    def __init__(
+        self,
+        name: str = SESSION_SHM_NAME,
+        slots: int = SESSION_SHM_SLOTS,
+        lock_path: Path = SESSION_LOCK_PATH,
+        deck_factory: Callable[[], Shoe] = Deck,
+        shoe_pool: Optional[ShoePool] = None,
+        idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL_SECONDS,
+    ) -> None:
+        if not 0 < slots < 1 << 32:
+            raise ValueError("The slab needs between 1 and 2**32 - 1 slots.")
+        self.name = name
+        self.slots = slots
+        self.lock_path = lock_path
+        self._deck_factory = deck_factory
+        self.shoe_pool = shoe_pool
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._lock_fd = -1
+        self._open_lock = threading.Lock()
+        self._allocation_lock = threading.Lock()
+        self._thread_locks = [threading.Lock() for _ in range(_THREAD_LOCK_STRIPES)]
+        self._next_slot = random.randrange(slots)
+        self.evictions: Dict[str, int] = {"expired": 0, "guest_lru": 0, "owned_lru": 0}
+
+    def _buffer(self) -> memoryview:
+        if self._segment is None:
+            with self._open_lock:
+                if self._segment is None:
+                    self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+                    # The allocation byte also serializes creating the segment.
+                    with _file_lock(self._lock_fd, self.slots):
+                        self._segment = self._attach()
+        return self._segment.buf
+
+    def _attach(self) -> shared_memory.SharedMemory:
+        layout = (_SLAB_MAGIC, session_records.RECORD_SIZE, self.slots)
+        try:
+            segment = shared_memory.SharedMemory(
+                self.name, create=True, size=_SLAB_DATA_OFFSET + self.slots * session_records.RECORD_SIZE
+            )
+            _SLAB_HEADER.pack_into(segment.buf, 0, *layout)
+        except FileExistsError:
+            segment = shared_memory.SharedMemory(self.name)
+            if _SLAB_HEADER.unpack_from(segment.buf, 0) != layout:
+                segment.close()
+                raise ValueError(f"Shared memory segment '{self.name}' has a different layout; unlink it first.")
+        # The slab outlives any single worker: keep the resource tracker from
+        # unlinking it when the process that mapped it exits.
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+    @staticmethod
+    def _offset(slot: int) -> int:
+        return _SLAB_DATA_OFFSET + slot * session_records.RECORD_SIZE
+
+    @contextmanager
+    def _slot_lock(self, slot: int) -> Iterator[None]:
+        with self._thread_locks[slot % _THREAD_LOCK_STRIPES], _file_lock(self._lock_fd, slot):
+            yield
+
+    def _locate(self, session_id: str) -> Optional[Tuple[int, int]]:
+        if len(session_id) != 24:
+            return None
+        try:
+            slot, token = int(session_id[:8], 16), int(session_id[8:], 16)
+        except ValueError:
+            return None
+        if slot >= self.slots or not token:
+            return None
+        return slot, token
+
+    def create_session(
+        self,
+        bet: int = 0,
+        owner_id: Optional[int] = None,
+        side_bets: Optional[Dict[str, int]] = None,
+        deck: Optional[Shoe] = None,
+    ) -> GameSession:
+        if deck is None:
+            deck = self.shoe_pool.acquire() if self.shoe_pool else self._deck_factory()
+        session = GameSession(bet=bet, owner_id=owner_id, side_bets=side_bets, deck=deck)
+        buffer = self._buffer()
+        now = time.time()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+        token = random.getrandbits(64) or 1
+        record = bytearray(session_records.RECORD_SIZE)
+        session_records.pack_session(session, record, 0, token, now)
+        with self._allocation_lock, _file_lock(self._lock_fd, self.slots):
+            slot = self._allocate(buffer, record, now)
+        session.session_id = f"{slot:08x}{token:016x}"
+        return session
+
+    def _allocate(self, buffer: memoryview, record: bytearray, now: float) -> int:
+        """Copy ``record`` into a free or expired slot, else over the LRU session."""
+        cutoff = now - self.idle_ttl
+        victims: Dict[bool, Tuple[float, int, Tuple[int, int, float, int]]] = {}
+        for step in range(self.slots):
+            slot = (self._next_slot + step) % self.slots
+            observed = session_records.read_slot(buffer, self._offset(slot))
+            state, _, last_access, owner_id = observed
+            if state == session_records.SLOT_USED and last_access >= cutoff:
+                victim = victims.get(bool(owner_id))
+                if victim is None or last_access < victim[0]:
+                    victims[bool(owner_id)] = (last_access, slot, observed)
+                continue
+            if self._store(buffer, slot, observed, record):
+                if state == session_records.SLOT_USED:
+                    self.evictions["expired"] += 1
+                self._next_slot = (slot + 1) % self.slots
+                return slot
+        for is_owned, reason in ((False, "guest_lru"), (True, "owned_lru")):
+            victim = victims.get(is_owned)
+            if victim and self._store(buffer, victim[1], victim[2], record):
+                self.evictions[reason] += 1
+                return victim[1]
+        raise RuntimeError("No session slot could be allocated.")
+
+    def _store(self, buffer: memoryview, slot: int, observed: Tuple[int, int, float, int], record: bytearray) -> bool:
+        offset = self._offset(slot)
+        with self._slot_lock(slot):
+            # The scan reads slots unlocked; only take the slot if it is unchanged.
+            if session_records.read_slot(buffer, offset) != observed:
+                return False
+            self._write(buffer, offset, record)
+        return True
+
+    @staticmethod
+    def _write(buffer: memoryview, offset: int, record: bytearray) -> None:
+        # Records are packed aside first, so a session that fails to pack
+        # never leaves a half-written slot behind.
+        buffer[offset] = session_records.SLOT_FREE
+        buffer[offset + 1 : offset + len(record)] = memoryview(record)[1:]
+        buffer[offset] = session_records.SLOT_USED
+
+    def _load(self, buffer: memoryview, slot: int, token: int, session_id: str, now: float) -> Optional[GameSession]:
+        offset = self._offset(slot)
+        state, stored_token, last_access, _ = session_records.read_slot(buffer, offset)
+        if state != session_records.SLOT_USED or stored_token != token or now - last_access > self.idle_ttl:
+            return None
+        return session_records.unpack_session(buffer, offset, session_id)
+
+    def get_session(self, session_id: str) -> Optional[GameSession]:
+        located = self._locate(session_id)
+        if located is None:
+            return None
+        slot, token = located
+        buffer = self._buffer()
+        now = time.time()
+        with self._slot_lock(slot):
+            session = self._load(buffer, slot, token, session_id, now)
+            if session is not None:
+                session_records.touch(buffer, self._offset(slot), now)
+        return session
+
+    @contextmanager
+    def checkout(self, session_id: str) -> Iterator[Optional[GameSession]]:
+        """Hold the slot lock for the whole action and write the record back on exit.
+
+        As with the other stores, the session is saved even when the action raises.
+        """
+        located = self._locate(session_id)
+        if located is None:
+            yield None
+            return
+        slot, token = located
+        buffer = self._buffer()
+        with self._slot_lock(slot):
+            session = self._load(buffer, slot, token, session_id, time.time())
+            try:
+                yield session
+            finally:
+                if session is not None:
+                    record = bytearray(session_records.RECORD_SIZE)
+                    session_records.pack_session(session, record, 0, token)
+                    self._write(buffer, self._offset(slot), record)
+
+    def remove_session(self, session_id: str) -> None:
+        located = self._locate(session_id)
+        if located is None:
+            return
+        slot, token = located
+        buffer = self._buffer()
+        offset = self._offset(slot)
+        with self._slot_lock(slot):
+            state, stored_token, _, _ = session_records.read_slot(buffer, offset)
+            if state == session_records.SLOT_USED and stored_token == token:
+                session_records.free_slot(buffer, offset)
+
+    def sweep(self) -> int:
+        """Free every expired slot now and return how many were freed."""
+        buffer = self._buffer()
+        now = time.time()
+        cutoff = now - self.idle_ttl
+        removed = 0
+        for slot in range(self.slots):
+            offset = self._offset(slot)
+            observed = session_records.read_slot(buffer, offset)
+            if observed[0] != session_records.SLOT_USED or observed[2] >= cutoff:
+                continue
+            with self._slot_lock(slot):
+                if session_records.read_slot(buffer, offset) == observed:
+                    session_records.free_slot(buffer, offset)
+                    removed += 1
+        self.evictions["expired"] += removed
+        self._last_sweep = now
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        buffer = self._buffer()
+        guest_sessions = owned_sessions = 0
+        for slot in range(self.slots):
+            state, _, _, owner_id = session_records.read_slot(buffer, self._offset(slot))
+            if state == session_records.SLOT_USED:
+                if owner_id:
+                    owned_sessions += 1
+                else:
+                    guest_sessions += 1
+        return {
+            "guest_sessions": guest_sessions,
+            "owned_sessions": owned_sessions,
+            "slots": self.slots,
+            "evictions": dict(self.evictions),
+        }
+
+    def unlink(self) -> None:
+        """Destroy the slab; only once no worker process uses it any more."""
+        self._buffer()
+        # Undo the unregister done in ``_attach``; ``unlink`` unregisters again.
+        resource_tracker.register(self._segment._name, "shared_memory")
+        self._segment.unlink()
+
+
+SessionStore = Union[SessionManager, SQLiteSessionStore, SharedMemorySessionStore]
+
+
+def build_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return memory_session_manager
+    if backend == "sqlite":
+        return SQLiteSessionStore(deck_factory=DECK_FACTORIES[DECK_MODE], shoe_pool=shoe_pool)
+    if backend == "shm":
+        return SharedMemorySessionStore(deck_factory=DECK_FACTORIES[DECK_MODE], shoe_pool=shoe_pool)
+    raise ValueError(f"Unknown session backend '{backend}'.")
+
+
+session_manager = build_session_store()
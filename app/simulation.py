@@ -0,0 +1,552 @@
+"""Vectorized Monte Carlo simulator for the rules implemented by ``GameSession``.
+
+Rounds are played in batches as NumPy array operations: every round of a batch
+gets its own freshly shuffled 8-deck shoe (as ``POST /game/start`` does), the
+player follows a pluggable vectorized strategy, and payouts follow
+``GameSession.payout``: 3:2 blackjack rounded down, 1:1 wins, resplits up to
+four hands, double after split, dealer stands on all 17 and side bets from
+``SIDE_BET_DEFINITIONS``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import strategy
+from .blackjack import (
+    ACE_RANK_INDEX,
+    CARD_RANK_INDEXES,
+    CARD_VALUES,
+    CARDS_PER_DECK,
+    NUMBER_OF_DECKS,
+    SIDE_BET_DEFINITIONS,
+    GameSession,
+)
+
+ACTION_STAND = 0
+ACTION_HIT = 1
+ACTION_DOUBLE = 2
+ACTION_SPLIT = 3
+
+MAX_HANDS = 4
+# Enough cards for four split hands and the dealer in any realistic round.
+CARDS_PER_ROUND = 64
+DEFAULT_CHUNK_SIZE = 10_000
+
+OUTCOMES = (
+    "player_blackjack",
+    "dealer_blackjack",
+    "push",
+    "player_win",
+    "dealer_bust",
+    "dealer_win",
+    "player_bust",
+)
+_BLACKJACK, _DEALER_BLACKJACK, _PUSH, _WIN, _DEALER_BUST, _LOSS, _BUST = range(len(OUTCOMES))
+_NO_OUTCOME = -1
+
+_RANK_INDEX = np.array(CARD_RANK_INDEXES, dtype=np.int8)
+_HARD_VALUE = np.array(
+    [1 if rank == ACE_RANK_INDEX else value for rank, value in zip(CARD_RANK_INDEXES, CARD_VALUES)],
+    dtype=np.int16,
+)
+_IS_ACE = _RANK_INDEX == ACE_RANK_INDEX
+
+
+@dataclass
+class Decision:
+    """Vectorized view of the hands awaiting a decision, one entry per round."""
+
+    total: np.ndarray
+    soft: np.ndarray
+    card_count: np.ndarray
+    pair_rank: np.ndarray  # rank index of a two-card pair, -1 otherwise
+    dealer_up: np.ndarray  # dealer upcard value, Ace counted as 11
+    can_double: np.ndarray
+    can_split: np.ndarray
+
+
+Strategy = Callable[[Decision], np.ndarray]
+
+
+def always_stand(decision: Decision) -> np.ndarray:
+    return np.full(decision.total.shape, ACTION_STAND, dtype=np.int8)
+
+
+def mimic_dealer(decision: Decision) -> np.ndarray:
+    return np.where(decision.total < 17, ACTION_HIT, ACTION_STAND).astype(np.int8)
+
+
+_ACTION_VALUES = {"stand": ACTION_STAND, "hit": ACTION_HIT, "double": ACTION_DOUBLE, "split": ACTION_SPLIT}
+# Table code byte -> action, when doubling is allowed and when it is not.
+_PREFERRED_ACTION = np.full(256, ACTION_HIT, dtype=np.int8)
+_FALLBACK_ACTION = np.full(256, ACTION_HIT, dtype=np.int8)
+for _code, (_preferred, _fallback) in strategy.ACTIONS.items():
+    _PREFERRED_ACTION[ord(_code)] = _ACTION_VALUES[_preferred]
+    _FALLBACK_ACTION[ord(_code)] = _ACTION_VALUES[_fallback]
+
+
+def basic_strategy(decision: Decision) -> np.ndarray:
+    """Follow the memory-mapped basic-strategy table of ``app.strategy``."""
+    codes = np.frombuffer(strategy.get_table().buffer, dtype=np.uint8)
+    total = decision.total.astype(np.intp)
+    column = decision.dealer_up.astype(np.intp) - strategy.DEALER_UPCARDS[0]
+    hard_row = np.clip(total, strategy.HARD_TOTALS[0], strategy.HARD_TOTALS[-1]) - strategy.HARD_TOTALS[0]
+    offset = np.where(
+        decision.can_split,
+        strategy.PAIR_OFFSET + np.maximum(decision.pair_rank.astype(np.intp), 0) * strategy.COLUMNS,
+        np.where(
+            decision.soft,
+            strategy.SOFT_OFFSET + (total - strategy.SOFT_TOTALS[0]) * strategy.COLUMNS,
+            strategy.HARD_OFFSET + hard_row * strategy.COLUMNS,
+        ),
+    )
+    code = codes[offset + column]
+    return np.where(decision.can_double, _PREFERRED_ACTION[code], _FALLBACK_ACTION[code])
+
+
+STRATEGIES: Dict[str, Strategy] = {
+    "basic": basic_strategy,
+    "stand": always_stand,
+    "dealer": mimic_dealer,
+}
+
+
+@dataclass
+class SimulationResult:
+    """Aggregated statistics of simulated rounds, mergeable across batches."""
+
+    bet: int
+    rounds: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    wagered: int = 0
+    outcomes: Dict[str, int] = field(default_factory=lambda: {name: 0 for name in OUTCOMES})
+    side_bet_net: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.rounds - 1) if self.rounds > 1 else 0.0
+
+    @property
+    def house_edge(self) -> float:
+        """Expected loss per round as a fraction of the initial main bet."""
+        return -self.mean / self.bet if self.bet else 0.0
+
+    def add_batch(self, net: np.ndarray, wagered: int, outcomes: np.ndarray, side_net: Dict[str, int]) -> None:
+        count = int(net.size)
+        if not count:
+            return
+        batch_mean = float(net.mean())
+        batch_m2 = float(((net - batch_mean) ** 2).sum())
+        self.merge(
+            SimulationResult(
+                bet=self.bet,
+                rounds=count,
+                mean=batch_mean,
+                m2=batch_m2,
+                wagered=wagered,
+                outcomes={
+                    name: int(np.count_nonzero(outcomes == code)) for code, name in enumerate(OUTCOMES)
+                },
+                side_bet_net=side_net,
+            )
+        )
+
+    def merge(self, other: "SimulationResult") -> None:
+        """Combine with another result (Chan et al. parallel mean/variance update)."""
+        if not other.rounds:
+            return
+        total = self.rounds + other.rounds
+        delta = other.mean - self.mean
+        self.mean += delta * other.rounds / total
+        self.m2 += other.m2 + delta * delta * self.rounds * other.rounds / total
+        self.rounds = total
+        self.wagered += other.wagered
+        for name, count in other.outcomes.items():
+            self.outcomes[name] = self.outcomes.get(name, 0) + count
+        for key, amount in other.side_bet_net.items():
+            self.side_bet_net[key] = self.side_bet_net.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "bet": self.bet,
+            "rounds": self.rounds,
+            "mean": self.mean,
+            "m2": self.m2,
+            "variance": self.variance,
+            "house_edge": self.house_edge,
+            "wagered": self.wagered,
+            "outcomes": dict(self.outcomes),
+            "side_bet_net": dict(self.side_bet_net),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "SimulationResult":
+        return cls(
+            bet=int(data["bet"]),
+            rounds=int(data["rounds"]),
+            mean=float(data["mean"]),
+            m2=float(data["m2"]),
+            wagered=int(data["wagered"]),
+            outcomes={key: int(value) for key, value in dict(data["outcomes"]).items()},
+            side_bet_net={key: int(value) for key, value in dict(data["side_bet_net"]).items()},
+        )
+
+
+def deal_cards(
+    rng: np.random.Generator,
+    rounds: int,
+    number_of_decks: int = NUMBER_OF_DECKS,
+) -> np.ndarray:
+    """Return the top ``CARDS_PER_ROUND`` card codes of a fresh shoe per round.
+
+    Only the first ``CARDS_PER_ROUND`` steps of a Fisher-Yates shuffle are run,
+    each one vectorized across all rounds.
+    """
+    size = CARDS_PER_DECK * number_of_decks
+    positions = np.tile(np.arange(size, dtype=np.int16), (rounds, 1))
+    rows = np.arange(rounds)
+    for index in range(CARDS_PER_ROUND):
+        targets = rng.integers(index, size, size=rounds)
+        picked = positions[rows, targets]
+        positions[rows, targets] = positions[:, index]
+        positions[:, index] = picked
+    return (positions[:, :CARDS_PER_ROUND] % CARDS_PER_DECK).astype(np.int8)
+
+
+def _hand_value(hard: np.ndarray, aces: np.ndarray) -> np.ndarray:
+    return hard + np.where((aces > 0) & (hard <= 11), 10, 0)
+
+
+class _Batch:
+    """Array state of a batch of rounds being played."""
+
+    def __init__(self, cards: np.ndarray) -> None:
+        rounds = cards.shape[0]
+        self.cards = cards
+        self.pointer = np.zeros(rounds, dtype=np.intp)
+        self.hard = np.zeros((rounds, MAX_HANDS), dtype=np.int16)
+        self.aces = np.zeros((rounds, MAX_HANDS), dtype=np.int8)
+        self.count = np.zeros((rounds, MAX_HANDS), dtype=np.int8)
+        self.first = np.zeros((rounds, MAX_HANDS), dtype=np.int8)
+        self.second = np.zeros((rounds, MAX_HANDS), dtype=np.int8)
+        self.doubled = np.zeros((rounds, MAX_HANDS), dtype=bool)
+        self.done = np.zeros((rounds, MAX_HANDS), dtype=bool)
+        self.bust = np.zeros((rounds, MAX_HANDS), dtype=bool)
+        self.hands = np.ones(rounds, dtype=np.int8)
+        self.dealer_hard = np.zeros(rounds, dtype=np.int16)
+        self.dealer_aces = np.zeros(rounds, dtype=np.int8)
+
+    def draw(self, rows: np.ndarray) -> np.ndarray:
+        pointer = self.pointer[rows]
+        if pointer.size and pointer.max() >= CARDS_PER_ROUND:
+            raise ValueError("A simulated round ran out of dealt cards.")
+        self.pointer[rows] = pointer + 1
+        return self.cards[rows, pointer]
+
+    def add_card(self, rows: np.ndarray, hand: int, codes: np.ndarray) -> None:
+        count = self.count[rows, hand]
+        self.first[rows, hand] = np.where(count == 0, codes, self.first[rows, hand])
+        self.second[rows, hand] = np.where(count == 1, codes, self.second[rows, hand])
+        self.hard[rows, hand] += _HARD_VALUE[codes]
+        self.aces[rows, hand] += _IS_ACE[codes]
+        self.count[rows, hand] = count + 1
+
+    def add_dealer_card(self, rows: np.ndarray, codes: np.ndarray) -> None:
+        self.dealer_hard[rows] += _HARD_VALUE[codes]
+        self.dealer_aces[rows] += _IS_ACE[codes]
+
+    def value(self, rows: np.ndarray, hand: int) -> np.ndarray:
+        return _hand_value(self.hard[rows, hand], self.aces[rows, hand])
+
+    def split(self, rows: np.ndarray, hand: int) -> None:
+        if not rows.size:
+            return
+        # Shift the unplayed hands right to make room for the new hand at ``hand + 1``.
+        for column in range(MAX_HANDS - 1, hand + 1, -1):
+            for values in (self.hard, self.aces, self.count, self.first, self.second, self.doubled, self.done, self.bust):
+                values[rows, column] = values[rows, column - 1]
+        second = self.second[rows, hand]
+        for column, code in ((hand, self.first[rows, hand]), (hand + 1, second)):
+            self.hard[rows, column] = _HARD_VALUE[code]
+            self.aces[rows, column] = _IS_ACE[code]
+            self.count[rows, column] = 1
+            self.first[rows, column] = code
+            self.doubled[rows, column] = False
+            self.done[rows, column] = False
+            self.bust[rows, column] = False
+        self.hands[rows] += 1
+        self.add_card(rows, hand, self.draw(rows))
+        self.add_card(rows, hand + 1, self.draw(rows))
+
+
+def play_batch(
+    cards: np.ndarray,
+    strategy: Strategy,
+    bet: int = 10,
+    side_bets: Optional[Dict[str, int]] = None,
+) -> Dict[str, np.ndarray]:
+    """Play one round per row of ``cards`` and return per-round arrays.
+
+    The result holds ``net`` (payout minus every stake, side bets included),
+    ``wagered`` and the per-hand ``outcomes`` codes (``-1`` for unused hands).
+    """
+    side_bets = {key: max(0, int(value)) for key, value in (side_bets or {}).items()}
+    rounds = cards.shape[0]
+    state = _Batch(cards)
+    everyone = np.arange(rounds)
+
+    for _ in range(2):
+        state.add_card(everyone, 0, state.draw(everyone))
+        state.add_dealer_card(everyone, state.draw(everyone))
+    dealer_up = _HARD_VALUE[cards[:, 1]]
+    dealer_up = np.where(_IS_ACE[cards[:, 1]], 11, dealer_up)
+    dealer_natural = _hand_value(state.dealer_hard, state.dealer_aces) == 21
+    player_natural = state.value(everyone, 0) == 21
+    natural = dealer_natural | player_natural
+    state.done[natural, 0] = True
+
+    for hand in range(MAX_HANDS):
+        active = ~natural & (state.hands > hand) & ~state.done[:, hand]
+        rows = np.flatnonzero(active)
+        while rows.size:
+            count = state.count[rows, hand]
+            first_rank = _RANK_INDEX[state.first[rows, hand]]
+            is_pair = (count == 2) & (first_rank == _RANK_INDEX[state.second[rows, hand]])
+            can_double = (count == 2) & ~state.doubled[rows, hand]
+            can_split = is_pair & (state.hands[rows] < MAX_HANDS)
+            actions = np.asarray(
+                strategy(
+                    Decision(
+                        total=state.value(rows, hand),
+                        soft=(state.aces[rows, hand] > 0) & (state.hard[rows, hand] <= 11),
+                        card_count=count,
+                        pair_rank=np.where(is_pair, first_rank, -1),
+                        dealer_up=dealer_up[rows],
+                        can_double=can_double,
+                        can_split=can_split,
+                    )
+                )
+            )
+            # Moves the engine would reject fall back to a hit.
+            actions = np.where((actions == ACTION_DOUBLE) & ~can_double, ACTION_HIT, actions)
+            actions = np.where((actions == ACTION_SPLIT) & ~can_split, ACTION_HIT, actions)
+
+            standing = rows[actions == ACTION_STAND]
+            state.done[standing, hand] = True
+
+            hitting = rows[actions == ACTION_HIT]
+            state.add_card(hitting, hand, state.draw(hitting))
+            value = state.value(hitting, hand)
+            state.bust[hitting, hand] = value > 21
+            state.done[hitting, hand] = value >= 21
+
+            doubling = rows[actions == ACTION_DOUBLE]
+            state.doubled[doubling, hand] = True
+            state.add_card(doubling, hand, state.draw(doubling))
+            state.bust[doubling, hand] = state.value(doubling, hand) > 21
+            state.done[doubling, hand] = True
+
+            state.split(rows[actions == ACTION_SPLIT], hand)
+
+            rows = rows[~state.done[rows, hand]]
+
+    in_play = np.arange(MAX_HANDS)[None, :] < state.hands[:, None]
+    needs_dealer = ~natural & (in_play & ~state.bust).any(axis=1)
+    rows = np.flatnonzero(needs_dealer)
+    while rows.size:
+        rows = rows[_hand_value(state.dealer_hard[rows], state.dealer_aces[rows]) < 17]
+        state.add_dealer_card(rows, state.draw(rows))
+    dealer_total = _hand_value(state.dealer_hard, state.dealer_aces)
+
+    player_total = _hand_value(state.hard, state.aces)
+    dealer_column = dealer_total[:, None]
+    outcomes = np.select(
+        [
+            ~in_play,
+            state.bust,
+            (dealer_column > 21),
+            player_total > dealer_column,
+            player_total < dealer_column,
+        ],
+        [_NO_OUTCOME, _BUST, _DEALER_BUST, _WIN, _LOSS],
+        default=_PUSH,
+    ).astype(np.int8)
+    outcomes[natural, 1:] = _NO_OUTCOME
+    outcomes[:, 0] = np.select(
+        [dealer_natural & player_natural, player_natural, dealer_natural],
+        [_PUSH, _BLACKJACK, _DEALER_BLACKJACK],
+        default=outcomes[:, 0],
+    )
+
+    stakes = np.where(in_play, bet * np.where(state.doubled, 2, 1), 0)
+    returns = np.select(
+        [outcomes == _BLACKJACK, (outcomes == _WIN) | (outcomes == _DEALER_BUST), outcomes == _PUSH],
+        [int(bet * 2.5), stakes * 2, stakes],
+        default=0,
+    )
+    if bet <= 0:
+        returns = np.zeros_like(returns)
+    net = (returns - stakes).sum(axis=1).astype(np.int64)
+    wagered = stakes.sum(axis=1).astype(np.int64)
+
+    side_net: Dict[str, np.ndarray] = {}
+    first_card, second_card = cards[:, 0], cards[:, 2]
+    side_wins = {
+        "pair": _RANK_INDEX[first_card] == _RANK_INDEX[second_card],
+        "suited_pair": first_card == second_card,
+    }
+    for key, amount in side_bets.items():
+        if amount <= 0:
+            continue
+        definition = SIDE_BET_DEFINITIONS.get(key)
+        wins = side_wins.get(key, np.zeros(rounds, dtype=bool)) if definition else np.zeros(rounds, dtype=bool)
+        multiplier = int(definition["payout_multiplier"]) if definition else 0
+        side_net[key] = np.where(wins, amount * multiplier, 0) - amount
+        net += side_net[key]
+        wagered += amount
+
+    return {"net": net, "wagered": wagered, "outcomes": outcomes, "side_net": side_net}
+
+
+def simulate(
+    rounds: int,
+    strategy: Strategy = mimic_dealer,
+    *,
+    seed: Optional[int] = None,
+    bet: int = 10,
+    side_bets: Optional[Dict[str, int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rng: Optional[np.random.Generator] = None,
+) -> SimulationResult:
+    """Play ``rounds`` rounds in batches of ``chunk_size`` and aggregate them."""
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    result = SimulationResult(bet=bet)
+    remaining = rounds
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        batch = play_batch(deal_cards(rng, size), strategy, bet=bet, side_bets=side_bets)
+        outcomes = batch["outcomes"]
+        result.add_batch(
+            batch["net"],
+            int(batch["wagered"].sum()),
+            outcomes[outcomes != _NO_OUTCOME],
+            {key: int(values.sum()) for key, values in batch["side_net"].items()},
+        )
+        remaining -= size
+    return result
+
+
+class _StackedShoe:
+    """Shoe dealing a fixed sequence of card codes, used to replay simulated rounds."""
+
+    needs_shuffle = False
+
+    def __init__(self, cards: Sequence[int]) -> None:
+        self._cards = [int(card) for card in cards]
+        self._position = 0
+
+    def draw(self) -> int:
+        card = self._cards[self._position]
+        self._position += 1
+        return card
+
+    def reshuffle(self) -> None:
+        raise ValueError("A stacked shoe cannot be reshuffled.")
+
+
+def _engine_decision(session: GameSession, index: int, funds: Optional[int] = None) -> Decision:
+    hand = session.player_hands[index].hand
+    cards = hand.cards
+    first_rank = CARD_RANK_INDEXES[cards[0]]
+    is_pair = len(cards) == 2 and first_rank == CARD_RANK_INDEXES[cards[1]]
+    up = session.dealer_hand.cards[0]
+    return Decision(
+        total=np.array([hand.value]),
+        soft=np.array([hand.is_soft]),
+        card_count=np.array([len(cards)]),
+        pair_rank=np.array([first_rank if is_pair else -1]),
+        dealer_up=np.array([11 if CARD_RANK_INDEXES[up] == ACE_RANK_INDEX else CARD_VALUES[up]]),
+        can_double=np.array([session.can_double_hand(index) and (funds is None or session.double_cost(index) <= funds)]),
+        can_split=np.array([session.can_split_hand(index) and (funds is None or session.split_cost(index) <= funds)]),
+    )
+
+
+def play_session_round(session: GameSession, strategy: Strategy, funds: Optional[int] = None) -> int:
+    """Play the current round of ``session`` to the end and return the extra stakes.
+
+    With ``funds`` given, doubles and splits costing more than what is left
+    are not offered to the strategy. Moves the engine rejects fall back to a
+    hit, as in ``play_batch``.
+    """
+    extra = 0
+    while not session.is_over:
+        index = session.active_hand_index
+        decision = _engine_decision(session, index, None if funds is None else funds - extra)
+        action = int(strategy(decision)[0])
+        if action == ACTION_DOUBLE and decision.can_double[0]:
+            extra += session.double_cost(index)
+            session.player_double(index)
+        elif action == ACTION_SPLIT and decision.can_split[0]:
+            extra += session.split_cost(index)
+            session.player_split(index)
+        elif action == ACTION_STAND:
+            session.player_stand(index)
+        else:
+            session.player_hit(index)
+    return extra
+
+
+def play_reference_round(
+    cards: Sequence[int],
+    strategy: Strategy,
+    bet: int = 10,
+    side_bets: Optional[Dict[str, int]] = None,
+) -> int:
+    """Play one round through ``GameSession`` and return the player's net result."""
+    session = GameSession(bet=bet, side_bets=side_bets, deck=_StackedShoe(cards))
+    play_session_round(session, strategy)
+    wagered = session.bet + sum(session.side_bets.values())
+    return session.payout() - wagered
+
+
+def compare_with_engine(
+    rounds: int,
+    strategy: Strategy = mimic_dealer,
+    *,
+    seed: int = 0,
+    bet: int = 10,
+    side_bets: Optional[Dict[str, int]] = None,
+) -> List[int]:
+    """Replay simulated rounds through ``GameSession`` and list the rounds that differ."""
+    cards = deal_cards(np.random.default_rng(seed), rounds)
+    simulated = play_batch(cards, strategy, bet=bet, side_bets=side_bets)["net"]
+    return [
+        index
+        for index in range(rounds)
+        if play_reference_round(cards[index], strategy, bet=bet, side_bets=side_bets) != simulated[index]
+    ]
+
+
+__all__ = [
+    "ACTION_DOUBLE",
+    "ACTION_HIT",
+    "ACTION_SPLIT",
+    "ACTION_STAND",
+    "Decision",
+    "STRATEGIES",
+    "SimulationResult",
+    "Strategy",
+    "always_stand",
+    "basic_strategy",
+    "compare_with_engine",
+    "deal_cards",
+    "mimic_dealer",
+    "play_batch",
+    "play_reference_round",
+    "play_session_round",
+    "simulate",
+]
@@ -0,0 +1,159 @@
+"""Binary snapshots of the in-memory sessions, so restarts keep rounds in play.
+
+A snapshot is a header followed by one entry per session: the session id and
+its ``app.session_records`` record, trimmed to the bytes in use. Snapshots
+are written periodically by a background thread and on shutdown, and read
+back on startup. Restoring only indexes the records; each session is decoded
+when it is first accessed (see ``SessionManager.restore``), so a restart with
+100k live sessions is a single file read.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from . import session_records
+from .blackjack import WORKER_ID, GameSession, SessionManager
+
+# Instances behind a worker-affine proxy each keep their own sessions.
+SNAPSHOT_PATH = Path(
+    os.environ.get("BLACKJACK_SNAPSHOT_PATH", f"data/sessions{'-' + WORKER_ID if WORKER_ID else ''}.snapshot")
+)
+SNAPSHOT_INTERVAL_SECONDS = 60
+
+MAGIC = b"OBJSNAP1"
+_HEADER = struct.Struct("<8sIId")
+_ENTRY = struct.Struct("<BH")
+
+logger = logging.getLogger(__name__)
+
+# The periodic and the shutdown snapshots may overlap; they are taken one at a time.
+_write_lock = threading.Lock()
+_snapshot_thread: Optional[threading.Thread] = None
+_stop_snapshots = threading.Event()
+
+
+def _record(session: GameSession) -> bytes:
+    buffer = bytearray(session_records.RECORD_SIZE)
+    # Records keep wall-clock times; sessions in memory use the monotonic clock.
+    last_access = time.time() - max(0.0, time.monotonic() - session.last_access)
+    with session.lock:
+        session_records.pack_session(session, buffer, 0, 0, last_access)
+    return bytes(buffer[: session_records.packed_size(buffer, 0)])
+
+
+def write_snapshot(manager: SessionManager, path: Path = SNAPSHOT_PATH) -> int:
+    """Write every live session to ``path`` and return how many were written."""
+    # Collecting under the lock too keeps an older snapshot from replacing a newer one.
+    with _write_lock:
+        entries = []
+        for session in manager.sessions():
+            try:
+                entries.append((session.session_id.encode("ascii"), _record(session)))
+            except ValueError:
+                # A session the record format cannot hold is left out.
+                continue
+        # Restored sessions nobody has come back to yet are carried over as is.
+        for session_id, (_, record) in manager.restored_records():
+            entries.append((session_id.encode("ascii"), bytes(record)))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(prefix=f"{path.name}.", suffix=".tmp", dir=path.parent)
+        try:
+            with open(descriptor, "wb") as handle:
+                handle.write(_HEADER.pack(MAGIC, session_records.RECORD_SIZE, len(entries), time.time()))
+                for session_id, record in entries:
+                    handle.write(_ENTRY.pack(len(session_id), len(record)))
+                    handle.write(session_id)
+                    handle.write(record)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    return len(entries)
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> Dict[str, Tuple[float, memoryview]]:
+    """Index a snapshot: session id -> (wall-clock last access, record).
+
+    Raises ``ValueError`` if the file is not a complete snapshot of the
+    current record format.
+    """
+    data = memoryview(path.read_bytes())
+    try:
+        magic, record_size, count, _ = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or record_size != session_records.RECORD_SIZE:
+            raise ValueError(f"{path} is not a snapshot of the current record format.")
+        records: Dict[str, Tuple[float, memoryview]] = {}
+        offset = _HEADER.size
+        for _ in range(count):
+            id_length, record_length = _ENTRY.unpack_from(data, offset)
+            offset += _ENTRY.size
+            if offset + id_length + record_length > len(data):
+                raise ValueError(f"{path} is truncated.")
+            session_id = str(data[offset : offset + id_length], "ascii")
+            offset += id_length
+            record = data[offset : offset + record_length]
+            offset += record_length
+            if record_length > record_size or session_records.packed_size(record, 0) != record_length:
+                raise ValueError(f"{path} holds a malformed record for session {session_id}.")
+            records[session_id] = (session_records.read_slot(record, 0)[2], record)
+    except struct.error as exc:
+        raise ValueError(f"{path} is truncated or corrupt: {exc}") from None
+    return records
+
+
+def restore_snapshot(manager: SessionManager, path: Path = SNAPSHOT_PATH) -> int:
+    """Hand the unexpired sessions of the snapshot at ``path`` to ``manager``."""
+    if not path.exists():
+        return 0
+    try:
+        snapshot = read_snapshot(path)
+    except (OSError, ValueError) as exc:
+        # Another record format, or a file cut short: start empty rather than not at all.
+        logger.warning("Ignoring session snapshot: %s", exc)
+        return 0
+    cutoff = time.time() - manager.idle_ttl
+    records = {session_id: entry for session_id, entry in snapshot.items() if entry[0] >= cutoff}
+    manager.restore(records, lambda session_id, record: session_records.unpack_session(record, 0, session_id))
+    return len(records)
+
+
+def start_snapshot_thread(manager: SessionManager, path: Path = SNAPSHOT_PATH) -> None:
+    global _snapshot_thread
+    if _snapshot_thread and _snapshot_thread.is_alive():
+        return
+
+    _stop_snapshots.clear()
+
+    def _run_snapshots() -> None:
+        while not _stop_snapshots.wait(SNAPSHOT_INTERVAL_SECONDS):
+            try:
+                write_snapshot(manager, path)
+            except Exception:
+                # Best-effort snapshot; the next one or the shutdown one will retry.
+                continue
+
+    _snapshot_thread = threading.Thread(target=_run_snapshots, name="snapshot-thread", daemon=True)
+    _snapshot_thread.start()
+
+
+def stop_snapshot_thread() -> None:
+    _stop_snapshots.set()
+    if _snapshot_thread and _snapshot_thread.is_alive():
+        _snapshot_thread.join(timeout=1)
+
+
+__all__ = [
+    "read_snapshot",
+    "restore_snapshot",
+    "start_snapshot_thread",
+    "stop_snapshot_thread",
+    "write_snapshot",
+]
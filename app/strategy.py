@@ -0,0 +1,184 @@
+"""Precomputed basic-strategy tables shared by all workers through ``mmap``.
+
+The tables for a rule set are written to a small binary file (one ASCII
+action code per player hand and dealer upcard), rewritten only when the
+charts change, and every process maps that file read-only, so lookups are
+a single byte read from the shared page cache.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+from .blackjack import (
+    ACE_RANK_INDEX,
+    CARD_RANK_INDEXES,
+    CARD_VALUES,
+    NUMBER_OF_DECKS,
+    RANKS,
+    GameSession,
+)
+
+STRATEGY_DIR = Path(os.environ.get("BLACKJACK_STRATEGY_DIR", "data/strategy"))
+# Rules implemented by GameSession: dealer stands on all 17, double any two
+# cards including after a split, split up to four hands, no surrender.
+RULE_SET = f"decks{NUMBER_OF_DECKS}-s17-das-split4-nosurrender"
+MAGIC = b"OBJSTRT1"
+
+DEALER_UPCARDS = tuple(range(2, 12))  # Ace counted as 11
+HARD_TOTALS = tuple(range(4, 22))
+SOFT_TOTALS = tuple(range(12, 22))
+
+# Action codes: H hit, S stand, P split, D double (else hit), X double (else stand).
+ACTIONS = {
+    "H": ("hit", "hit"),
+    "S": ("stand", "stand"),
+    "P": ("split", "split"),
+    "D": ("double", "hit"),
+    "X": ("double", "stand"),
+}
+
+# Rows list the action against dealer upcards 2 3 4 5 6 7 8 9 10 A.
+_HARD_CHART: Dict[int, str] = {
+    **{total: "HHHHHHHHHH" for total in range(4, 9)},
+    9: "HDDDDHHHHH",
+    10: "DDDDDDDDHH",
+    11: "DDDDDDDDDH",
+    12: "HHSSSHHHHH",
+    **{total: "SSSSSHHHHH" for total in range(13, 17)},
+    **{total: "SSSSSSSSSS" for total in range(17, 22)},
+}
+_SOFT_CHART: Dict[int, str] = {
+    12: "HHHHHHHHHH",
+    13: "HHHDDHHHHH",
+    14: "HHHDDHHHHH",
+    15: "HHDDDHHHHH",
+    16: "HHDDDHHHHH",
+    17: "HDDDDHHHHH",
+    18: "SXXXXSSHHH",
+    19: "SSSSSSSSSS",
+    20: "SSSSSSSSSS",
+    21: "SSSSSSSSSS",
+}
+_PAIR_CHART: Dict[str, str] = {
+    "Ace": "PPPPPPPPPP",
+    "2": "PPPPPPHHHH",
+    "3": "PPPPPPHHHH",
+    "4": "HHHPPHHHHH",
+    "5": "DDDDDDDDHH",
+    "6": "PPPPPHHHHH",
+    "7": "PPPPPPHHHH",
+    "8": "PPPPPPPPPP",
+    "9": "PPPPPSPPSS",
+    "10": "SSSSSSSSSS",
+    "Jack": "SSSSSSSSSS",
+    "Queen": "SSSSSSSSSS",
+    "King": "SSSSSSSSSS",
+}
+
+COLUMNS = len(DEALER_UPCARDS)
+HARD_OFFSET = len(MAGIC)
+SOFT_OFFSET = HARD_OFFSET + len(HARD_TOTALS) * COLUMNS
+PAIR_OFFSET = SOFT_OFFSET + len(SOFT_TOTALS) * COLUMNS
+FILE_SIZE = PAIR_OFFSET + len(RANKS) * COLUMNS
+
+
+def build_tables() -> bytes:
+    rows: List[str] = [_HARD_CHART[total] for total in HARD_TOTALS]
+    rows += [_SOFT_CHART[total] for total in SOFT_TOTALS]
+    rows += [_PAIR_CHART[rank] for rank in RANKS]
+    return MAGIC + "".join(rows).encode("ascii")
+
+
+def strategy_path(rule_set: str = RULE_SET) -> Path:
+    return STRATEGY_DIR / f"{rule_set}.bin"
+
+
+def ensure_strategy_file(path: Optional[Path] = None) -> Path:
+    """Write the table file for the rule set unless it already holds the current tables.
+
+    The file outlives deployments on the data volume, so its contents are
+    compared with the charts above and rewritten when they differ.
+    """
+    path = path or strategy_path()
+    tables = build_tables()
+    try:
+        if path.read_bytes() == tables:
+            return path
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(tables)
+    # Atomic, so concurrent workers never map a partially written file.
+    os.replace(temporary, path)
+    return path
+
+
+class StrategyTable:
+    """Read-only view over a memory-mapped strategy file."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as handle:
+            self._buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) != FILE_SIZE or self._buffer[: len(MAGIC)] != MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a valid strategy table.")
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        return self._buffer
+
+    def code(self, *, total: int, soft: bool, pair_rank: Optional[int], dealer_up: int) -> str:
+        column = dealer_up - DEALER_UPCARDS[0]
+        if pair_rank is not None:
+            offset = PAIR_OFFSET + pair_rank * COLUMNS
+        elif soft:
+            offset = SOFT_OFFSET + (total - SOFT_TOTALS[0]) * COLUMNS
+        else:
+            offset = HARD_OFFSET + (min(max(total, HARD_TOTALS[0]), HARD_TOTALS[-1]) - HARD_TOTALS[0]) * COLUMNS
+        return chr(self._buffer[offset + column])
+
+    def recommend(self, session: GameSession, hand_index: int) -> str:
+        """Return ``hit``, ``stand``, ``double`` or ``split`` for a player hand."""
+        hand = session.player_hands[hand_index].hand
+        cards = hand.cards
+        up = session.dealer_hand.cards[0]
+        dealer_up = 11 if CARD_RANK_INDEXES[up] == ACE_RANK_INDEX else CARD_VALUES[up]
+        can_split = session.can_split_hand(hand_index)
+        code = self.code(
+            total=hand.value,
+            soft=hand.is_soft,
+            pair_rank=CARD_RANK_INDEXES[cards[0]] if can_split else None,
+            dealer_up=dealer_up,
+        )
+        preferred, fallback = ACTIONS[code]
+        if preferred == "double" and not session.can_double_hand(hand_index):
+            return fallback
+        return preferred
+
+
+_table: Optional[StrategyTable] = None
+_table_lock = Lock()
+
+
+def get_table() -> StrategyTable:
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = StrategyTable(ensure_strategy_file())
+    return _table
+
+
+__all__ = [
+    "RULE_SET",
+    "StrategyTable",
+    "build_tables",
+    "ensure_strategy_file",
+    "get_table",
+    "strategy_path",
+]
@@ -0,0 +1,88 @@
+"""Cost of hand totals and of building a session's state, with running totals
+and with the per-access rescan they replaced.
+
+``RescannedHand`` recomputes ``value`` from every card on each access, as
+``Hand`` did before it kept a running hard total and Ace count. States are
+built with ``_build_serialized``, bypassing the per-version cache. Run from
+the repository root::
+
+    python -m benchmarks.hand_totals --sessions 200 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+from typing import Callable, Dict, List, Optional, Type
+
+from app.blackjack import ACE_RANK_INDEX, CARD_RANK_INDEXES, CARD_VALUES, GameSession, Hand
+
+
+class RescannedHand(Hand):
+    """``Hand`` whose totals are recomputed from its cards on every access."""
+
+    @property
+    def value(self) -> int:
+        total = sum(CARD_VALUES[card] for card in self.cards)
+        aces = sum(1 for card in self.cards if CARD_RANK_INDEXES[card] == ACE_RANK_INDEX)
+        while total > 21 and aces:
+            total -= 10
+            aces -= 1
+        return total
+
+    def is_blackjack(self) -> bool:
+        return len(self.cards) == 2 and self.value == 21
+
+
+def played_sessions(count: int, seed: int) -> List[GameSession]:
+    """Sessions stopped at random points of their first round."""
+    random.seed(seed)
+    sessions = []
+    for _ in range(count):
+        session = GameSession(bet=10)
+        while not session.is_over and random.random() < 0.6:
+            session.player_hit(session.active_hand_index)
+        sessions.append(session)
+    return sessions
+
+
+def with_hands(sessions: List[GameSession], hand_type: Type[Hand]) -> List[GameSession]:
+    """Copies of ``sessions`` whose hands are of ``hand_type``."""
+    copies = []
+    for session in sessions:
+        copy = GameSession.from_state(session.to_state())
+        copy.dealer_hand = hand_type(list(copy.dealer_hand.cards))
+        for state in copy.player_hands:
+            state.hand = hand_type(list(state.hand.cards))
+        copies.append(copy)
+    return copies
+
+
+def per_call(func: Callable[[], object], calls: int, repeat: int) -> float:
+    """Best time per call, in microseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) / calls * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure hand totals and state building.")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is reported.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sessions = played_sessions(args.sessions, args.seed)
+    results: Dict[str, Dict[str, float]] = {}
+    for name, hand_type in (("rescan", RescannedHand), ("running", Hand)):
+        copies = with_hands(sessions, hand_type)
+        hands = [state.hand for session in copies for state in session.player_hands]
+        results[name] = {
+            "value": per_call(lambda: [hand.value for hand in hands], len(hands), args.repeat),
+            "serialize": per_call(lambda: [session._build_serialized() for session in copies], len(copies), args.repeat),
+        }
+    for measure in ("value", "serialize"):
+        before, after = results["rescan"][measure], results["running"][measure]
+        print(f"{measure:>9}: {before:.2f} us -> {after:.2f} us per call ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Load generator for a running server: game throughput and /health latency.
+
+A mix is a number of guest clients, signed-in clients and clients looping on
+``/login``. Game clients start a session and hit or stand until the round is
+over, then start again (or continue with ``/game/next`` with ``--next``).
+One more client polls ``/health`` to show how long the event loop takes to
+answer while under load. Requests go over raw keep-alive HTTP/1.1
+connections so that the client stays cheap next to the server. Start the
+server first, e.g. ``uvicorn app.main:app --port 8000``, then::
+
+    python -m benchmarks.load --mix 150,50,0 --mix 150,50,8 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+PASSWORD = "benchmark"
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection sending JSON requests."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(
+        self, method: str, path: str, body: Optional[dict] = None, token: Optional[str] = None
+    ) -> Tuple[int, dict]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        status_line = await self.reader.readline()
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        return int(status_line.split()[1]), json.loads(data) if data else {}
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self.health: List[float] = []
+
+    def record(self, kind: str, status_code: int) -> None:
+        self.counts[kind if status_code < 400 else "errors"] += 1
+
+
+async def sign_up(connection: Connection) -> Tuple[str, str]:
+    username = "load" + uuid.uuid4().hex[:12]
+    status_code, body = await connection.request("POST", "/signup", {"username": username, "password": PASSWORD})
+    if status_code != 201:
+        raise RuntimeError(f"sign-up failed with {status_code}: {body}")
+    return username, body["token"]
+
+
+async def game_client(
+    connection: Connection, stats: Stats, deadline: float, token: Optional[str], bet: int, use_next: bool
+) -> None:
+    session_id = None
+    while time.perf_counter() < deadline:
+        if use_next and session_id:
+            status_code, state = await connection.request("POST", "/game/next", {"session_id": session_id, "bet": bet}, token)
+        else:
+            status_code, state = await connection.request("POST", "/game/start", {"bet": bet}, token)
+        stats.record("game", status_code)
+        if status_code >= 400:
+            session_id = None
+            continue
+        session_id = state["session_id"]
+        while not state["is_over"] and time.perf_counter() < deadline:
+            move = "hit" if state["player_hands"][state["active_hand_index"]]["value"] < 17 else "stand"
+            status_code, state = await connection.request("POST", f"/game/{move}", {"session_id": session_id}, token)
+            stats.record("game", status_code)
+            if status_code >= 400:
+                break
+
+
+async def login_client(connection: Connection, stats: Stats, deadline: float, username: str) -> None:
+    while time.perf_counter() < deadline:
+        status_code, _ = await connection.request("POST", "/login", {"username": username, "password": PASSWORD})
+        stats.record("login", status_code)
+
+
+async def health_client(connection: Connection, stats: Stats, deadline: float, interval: float) -> None:
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        await connection.request("GET", "/health")
+        stats.health.append((time.perf_counter() - began) * 1000)
+        await asyncio.sleep(interval)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+async def run_mix(
+    url: str, guests: int, signed_in: int, logins: int, duration: float, bet: int, use_next: bool
+) -> Dict[str, float]:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    connections = [Connection(host, port) for _ in range(guests + signed_in + logins + 1)]
+    stats = Stats()
+    try:
+        # Accounts are created before the clock starts; bcrypt would otherwise dominate.
+        accounts = [await sign_up(connection) for connection in connections[guests : guests + signed_in + logins]]
+        deadline = time.perf_counter() + duration
+        tasks = [game_client(connection, stats, deadline, None, bet, use_next) for connection in connections[:guests]]
+        tasks += [
+            game_client(connection, stats, deadline, token, bet, use_next)
+            for connection, (_, token) in zip(connections[guests : guests + signed_in], accounts[:signed_in])
+        ]
+        tasks += [
+            login_client(connection, stats, deadline, username)
+            for connection, (username, _) in zip(connections[guests + signed_in : -1], accounts[signed_in:])
+        ]
+        tasks.append(health_client(connections[-1], stats, deadline, 0.05))
+        random.shuffle(tasks)
+        await asyncio.gather(*tasks)
+    finally:
+        for connection in connections:
+            connection.close()
+    return {
+        "game": stats.counts["game"] / duration,
+        "login": stats.counts["login"] / duration,
+        "errors": stats.counts["errors"],
+        "health_p50": percentile(stats.health, 0.5),
+        "health_p99": percentile(stats.health, 0.99),
+    }
+
+
+def parse_mix(value: str) -> Tuple[int, int, int]:
+    guests, signed_in, logins = (int(part) for part in value.split(","))
+    return guests, signed_in, logins
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Drive a running server with game, login and /health clients.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--mix", type=parse_mix, action="append", help="guests,signed-in,logins clients; repeatable (default 150,50,0)."
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mix.")
+    parser.add_argument("--bet", type=int, default=0, help="Main bet of every round; 0 never runs a balance out.")
+    parser.add_argument("--next", dest="use_next", action="store_true", help="Continue sessions with /game/next.")
+    args = parser.parse_args(argv)
+
+    print(f"{'mix':>10}  {'game req/s':>10}  {'/login/s':>8}  {'errors':>6}  /health p50 / p99")
+    for guests, signed_in, logins in args.mix or [(150, 50, 0)]:
+        result = asyncio.run(run_mix(args.url, guests, signed_in, logins, args.duration, args.bet, args.use_next))
+        print(
+            f"{f'{guests},{signed_in},{logins}':>10}  {result['game']:>10.0f}  {result['login']:>8.1f}  "
+            f"{result['errors']:>6.0f}  {result['health_p50']:.0f} / {result['health_p99']:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Throughput of the session store under many threads.
+
+Each thread mixes lookups of existing sessions with creations of new ones,
+by default 95% / 5%, against one shared store: ``GlobalLockSessionManager``,
+the store as it was before sharding, where every lookup and creation takes
+one lock to move the session to the end of its LRU map, and
+``SessionManager`` with each requested shard count. Run from the repository
+root::
+
+    python -m benchmarks.session_contention --threads 64 --ops 20000
+
+``SessionManager`` lookups take no lock whatever the shard count, so the
+shard count only changes how creations contend. Threads share the GIL: on
+one core the figures are dominated by scheduling noise.
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Union
+
+from app.blackjack import (
+    MAX_GUEST_SESSIONS,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_SHARDS,
+    GameSession,
+    LazyDeck,
+    SessionManager,
+)
+
+
+class GlobalLockSessionManager:
+    """Guest-session part of the store before sharding: one lock around an LRU map."""
+
+    def __init__(self) -> None:
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create_session(self) -> GameSession:
+        session = GameSession(deck=LazyDeck())
+        session.last_access = time.monotonic()
+        with self._lock:
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > MAX_GUEST_SESSIONS:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[GameSession]:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.last_access > SESSION_IDLE_TTL_SECONDS:
+                del self._sessions[session_id]
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+
+Store = Union[GlobalLockSessionManager, SessionManager]
+
+
+def run(threads: int, ops: int, sessions: int, create_every: int, build: Callable[[], Store]) -> float:
+    """Operations per second over every thread."""
+    manager = build()
+    ids = [manager.create_session().session_id for _ in range(sessions)]
+    start = threading.Barrier(threads + 1)
+
+    def work(offset: int) -> None:
+        start.wait()
+        for index in range(ops):
+            if index % create_every == 0:
+                manager.create_session()
+            else:
+                manager.get_session(ids[(index * 7 + offset) % len(ids)])
+
+    workers = [threading.Thread(target=work, args=(offset,)) for offset in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    began = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * ops / (time.perf_counter() - began)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure session store throughput under contention.")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=20_000, help="Operations per thread.")
+    parser.add_argument("--sessions", type=int, default=2_000, help="Sessions created before the run.")
+    parser.add_argument("--create-every", type=int, default=20, help="One creation every N operations.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the best is reported.")
+    parser.add_argument(
+        "--shards",
+        type=int,
+        action="append",
+        help=f"SessionManager shard counts to compare with the global lock (default: 1 and {SESSION_SHARDS}).",
+    )
+    args = parser.parse_args(argv)
+
+    stores = {"global lock": GlobalLockSessionManager}
+    for shards in args.shards or [1, SESSION_SHARDS]:
+        stores[f"{shards} shard(s)"] = lambda shards=shards: SessionManager(deck_factory=LazyDeck, shards=shards)
+    for name, build in stores.items():
+        rate = max(run(args.threads, args.ops, args.sessions, args.create_every, build) for _ in range(args.repeat))
+        print(f"{name:>12}, {args.threads} threads: {rate:,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Memory held per shoe and per session by each deck mode.
+
+Measured with ``tracemalloc`` over many instances, after dealing from 0
+cards up to the cut card, since shoes last across rounds and a lazy shoe
+holds more displaced positions as it is dealt. Run from the repository
+root::
+
+    python -m benchmarks.shoe_memory --shoes 500 --dealt 0 --dealt 50 --dealt 312
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tracemalloc
+from typing import Callable, List, Optional
+
+from app.blackjack import (
+    CARDS_PER_DECK,
+    DECK_FACTORIES,
+    DEFAULT_PENETRATION,
+    NUMBER_OF_DECKS,
+    GameSession,
+    Shoe,
+    cut_card_position,
+)
+
+
+def bytes_per_instance(build: Callable[[], object], count: int) -> int:
+    tracemalloc.start()
+    try:
+        instances = [build() for _ in range(count)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del instances
+    return current // count
+
+
+def dealt_shoe(factory: Callable[[], Shoe], dealt: int) -> Shoe:
+    shoe = factory()
+    for _ in range(dealt):
+        shoe.draw()
+    return shoe
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure the memory held per shoe and per session.")
+    parser.add_argument("--shoes", type=int, default=500)
+    parser.add_argument(
+        "--dealt",
+        type=int,
+        action="append",
+        help="Cards drawn from each shoe before measuring (default: every 50 cards up to the cut card).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cut_card = cut_card_position(NUMBER_OF_DECKS * CARDS_PER_DECK, DEFAULT_PENETRATION)
+    counts = args.dealt or [*range(0, cut_card, 50), cut_card]
+    print("dealt " + "".join(f"{mode:>10}" for mode in DECK_FACTORIES) + "  (bytes per shoe)")
+    for dealt in counts:
+        sizes = []
+        for factory in DECK_FACTORIES.values():
+            random.seed(args.seed)
+            sizes.append(bytes_per_instance(lambda: dealt_shoe(factory, dealt), args.shoes))
+        print(f"{dealt:>5} " + "".join(f"{size:>10}" for size in sizes))
+    for mode, factory in DECK_FACTORIES.items():
+        random.seed(args.seed)
+        session = bytes_per_instance(lambda: GameSession(bet=10, deck=factory()), args.shoes)
+        print(f"{mode:>5}: {session} B/session after the first deal")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""CPU cost of game state responses, encoded directly and through pydantic.
+
+The pydantic path is what FastAPI did with ``response_model`` before the
+direct encoder: build ``GameStateResponse`` from ``serialize()``, validate it
+against the response field and run it through ``jsonable_encoder`` into a
+``JSONResponse``. Two measurements:
+
+* response building alone, per changed state (the state cache is cleared
+  before every response);
+* CPU time per request of guest flows through ``TestClient`` for each action
+  endpoint, with ``app.main.serialize_session`` swapped for the pydantic
+  path in the second run.
+
+Run from the repository root::
+
+    python -m benchmarks.state_responses --states 500 --flows 300
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Mapping, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+
+from app import main as app_main
+from app.blackjack import GameSession
+from app.responses import game_state_response
+from app.schemas import GameBatchResponse, GameStateResponse
+
+ENDPOINTS = ("start", "hit", "stand", "double", "state")
+
+
+def pydantic_response(
+    session: GameSession,
+    balance: Optional[int],
+    request: object = None,
+    headers: Optional[Mapping[str, str]] = None,
+    extra: Optional[Dict[str, object]] = None,
+    since_version: Optional[int] = None,
+) -> Response:
+    """The response FastAPI built from a returned model and ``response_model``."""
+    model_class = GameBatchResponse if extra else GameStateResponse
+    model = model_class(**session.serialize(), balance=balance, **(extra or {}))
+    # FastAPI re-validates the returned model against a clone of the response model.
+    validated = model_class.validate(model.dict())
+    return JSONResponse(jsonable_encoder(validated), headers=headers)
+
+
+def direct_response(session: GameSession, balance: Optional[int]) -> Response:
+    return game_state_response(session, balance)
+
+
+def sample_sessions(count: int, seed: int) -> List[GameSession]:
+    random.seed(seed)
+    sessions = []
+    for _ in range(count):
+        session = GameSession(bet=10, side_bets={"pair": 1})
+        if session.can_split_hand(0) and random.random() < 0.5:
+            session.player_split(0)
+        while not session.is_over and random.random() < 0.5:
+            session.player_hit(session.active_hand_index)
+        sessions.append(session)
+    return sessions
+
+
+def building_cost(sessions: List[GameSession], build: Callable[[GameSession, Optional[int]], Response]) -> float:
+    """Microseconds of CPU per response, each from a changed state."""
+    began = time.process_time()
+    for session in sessions:
+        session._changed()
+        build(session, 990).body
+    return (time.process_time() - began) / len(sessions) * 1e6
+
+
+def flow_costs(client: TestClient, flows: int) -> Dict[str, float]:
+    """Microseconds of CPU per request, by endpoint, over guest flows."""
+    spent: Dict[str, float] = defaultdict(float)
+    calls: Dict[str, int] = defaultdict(int)
+
+    def call(endpoint: str, method: str, path: str, body: Optional[dict] = None) -> dict:
+        began = time.process_time()
+        response = client.request(method, path, json=body)
+        spent[endpoint] += time.process_time() - began
+        calls[endpoint] += 1
+        return response.json()
+
+    for index in range(flows):
+        state = call("start", "POST", "/game/start", {"bet": 10})
+        session_id = state["session_id"]
+        if not state["is_over"]:
+            if index % 2 and state["player_hands"][0]["can_double"]:
+                state = call("double", "POST", "/game/double", {"session_id": session_id, "hand_index": 0})
+            else:
+                state = call("hit", "POST", "/game/hit", {"session_id": session_id})
+        if not state["is_over"]:
+            call("stand", "POST", "/game/stand", {"session_id": session_id})
+        call("state", "GET", f"/game/{session_id}")
+    return {endpoint: spent[endpoint] / calls[endpoint] * 1e6 for endpoint in ENDPOINTS if calls[endpoint]}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure game state response CPU cost.")
+    parser.add_argument("--states", type=int, default=500, help="Sessions whose response is built.")
+    parser.add_argument("--flows", type=int, default=300, help="Guest start/move/stand/get flows per run.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sessions = sample_sessions(args.states, args.seed)
+    before = building_cost(sessions, pydantic_response)
+    after = building_cost(sessions, direct_response)
+    print(f"building: {before:.0f} us -> {after:.0f} us per changed state")
+
+    # No ``with``: startup hooks would open the database, which guest flows never touch.
+    client = TestClient(app_main.app)
+    flow_costs(client, 20)
+    direct = flow_costs(client, args.flows)
+    original = app_main.serialize_session
+    app_main.serialize_session = pydantic_response
+    try:
+        through_pydantic = flow_costs(client, args.flows)
+    finally:
+        app_main.serialize_session = original
+    for endpoint in ENDPOINTS:
+        if endpoint in direct:
+            print(f"{endpoint:>6}: {through_pydantic[endpoint]:.0f} us -> {direct[endpoint]:.0f} us CPU per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Shared test setup."""
+import pytest
+
+from app import strategy
+
+
+@pytest.fixture(autouse=True, scope="session")
+def strategy_dir(tmp_path_factory):
+    """Write the basic-strategy table to a temporary directory, not ``data/strategy``."""
+    previous = strategy.STRATEGY_DIR
+    strategy.STRATEGY_DIR = tmp_path_factory.mktemp("strategy")
+    yield strategy.STRATEGY_DIR
+    strategy.STRATEGY_DIR = previous
@@ -0,0 +1,11 @@
+"""The vectorized simulator must settle every round exactly as the game engine does."""
+import pytest
+
+from app.blackjack import SIDE_BET_DEFINITIONS
+from app.simulation import STRATEGIES, compare_with_engine
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_simulated_rounds_match_engine(strategy: str) -> None:
+    side_bets = {key: 1 for key in SIDE_BET_DEFINITIONS}
+    assert compare_with_engine(500, STRATEGIES[strategy], seed=2024, bet=10, side_bets=side_bets) == []
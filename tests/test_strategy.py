@@ -0,0 +1,9 @@
+"""The strategy file on disk must always hold the current charts."""
+from app.strategy import build_tables, ensure_strategy_file
+
+
+def test_outdated_strategy_file_is_rewritten(tmp_path) -> None:
+    path = tmp_path / "rules.bin"
+    tables = build_tables()
+    path.write_bytes(tables[:-1] + b"H" if tables[-1:] != b"H" else tables[:-1] + b"S")
+    assert ensure_strategy_file(path).read_bytes() == tables